@@ -6,69 +6,170 @@ A wrapper script to run the SOTA RBN Matcher as a system service
 
 import os
 import sys
-import time
+import pickle
+import hashlib
 import signal
+import importlib
+import queue
 import logging
+import logging.config
 import logging.handlers
 from pathlib import Path
 from datetime import datetime
 
+# Parsed configuration is cached here between restarts
+CACHE_DIR = Path("/var/cache/sota-matcher")
+
+# Keep bytecode on a stable path that survives restarts
+os.environ.setdefault("PYTHONPYCACHEPREFIX", str(CACHE_DIR / "pycache"))
+if sys.pycache_prefix is None:
+    sys.pycache_prefix = os.environ["PYTHONPYCACHEPREFIX"]
+
+# Compiled Numba kernels go there too; the install directory is read-only for the service
+os.environ.setdefault("NUMBA_CACHE_DIR", str(CACHE_DIR / "numba"))
+
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the main matcher
-from sota_rbn_matcher_mysql import main, load_config
+# The matcher (and its MySQL/requests dependencies) is imported in main_daemon
+# once logging is configured, so import errors end up in the log files
+MATCHER_MODULE = "sota_rbn_matcher_mysql"
+matcher = None
+
+LOG_DIR = Path("/var/log/sota-matcher")
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+LOGGING_CONFIG = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'standard': {'format': LOG_FORMAT},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'level': 'INFO',
+            'formatter': 'standard',
+        },
+        'file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'level': 'INFO',
+            'formatter': 'standard',
+            'filename': str(LOG_DIR / "sota-matcher.log"),
+            'maxBytes': 10*1024*1024,  # 10MB
+            'backupCount': 5,
+            'delay': True,
+        },
+        'error': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'level': 'ERROR',
+            'formatter': 'standard',
+            'filename': str(LOG_DIR / "sota-matcher-error.log"),
+            'maxBytes': 5*1024*1024,  # 5MB
+            'backupCount': 3,
+            'delay': True,
+        },
+    },
+    'root': {
+        'level': 'INFO',
+        'handlers': ['console', 'file', 'error'],
+    },
+}
+
+_LOGGING_CONFIGURED = False
+_LOG_LISTENER = None
 
 # Configure logging
 def setup_logging():
-    """Setup logging for the daemon"""
-    # Create logs directory if it doesn't exist
-    log_dir = Path("/var/log/sota-matcher")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Configure logging
+    """Setup logging for the daemon (only configured once per process)"""
+    global _LOGGING_CONFIGURED, _LOG_LISTENER
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
+    if not _LOGGING_CONFIGURED:
+        # Create logs directory if it doesn't exist
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        logging.config.dictConfig(LOGGING_CONFIG)
+        
+        # Hand the configured handlers to a listener thread so file writes and
+        # rollovers never block the matcher threads
+        handlers = logger.handlers[:]
+        for handler in handlers:
+            logger.removeHandler(handler)
+        log_queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _LOG_LISTENER = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _LOG_LISTENER.start()
+        _LOGGING_CONFIGURED = True
+    
+    return logger
+
+def stop_logging():
+    """Flush queued log records and stop the listener thread"""
+    global _LOG_LISTENER
+    if _LOG_LISTENER is not None:
+        _LOG_LISTENER.stop()
+        _LOG_LISTENER = None
+
+def load_config_cached(config_file="config.json"):
+    """Load configuration, reusing a pickled copy while the file is unchanged"""
+    logger = logging.getLogger(__name__)
+    try:
+        stat = os.stat(config_file)
+        with open(config_file, 'rb') as f:
+            content = f.read()
+    except OSError:
+        return matcher.load_config(config_file)
     
-    # Remove existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
+    # Key the cache on mtime, size and content hash of the source file
+    digest = hashlib.blake2b(content, digest_size=16)
+    digest.update(f"{stat.st_mtime_ns}:{stat.st_size}".encode())
+    cache_file = CACHE_DIR / f"config.{digest.hexdigest()}.pkl"
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    # The cache holds the database and QRZ passwords, so only trust (and keep)
+    # a copy that nobody but the owner can read
+    try:
+        if os.stat(cache_file).st_mode & 0o077:
+            cache_file.unlink()
+        else:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
     
-    # File handler with rotation
-    file_handler = logging.handlers.RotatingFileHandler(
-        log_dir / "sota-matcher.log",
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5
-    )
-    file_handler.setLevel(logging.INFO)
-    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
+    config = matcher.load_config(config_file)
+    if not config:
+        return config
     
-    # Error log file
-    error_handler = logging.handlers.RotatingFileHandler(
-        log_dir / "sota-matcher-error.log",
-        maxBytes=5*1024*1024,  # 5MB
-        backupCount=3
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(file_formatter)
-    logger.addHandler(error_handler)
+    try:
+        CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # Drop cache entries for previous versions of the file
+        for stale in CACHE_DIR.glob("config.*.pkl"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+        tmp_file = cache_file.with_suffix(f".tmp{os.getpid()}")
+        tmp_file.unlink(missing_ok=True)  # A leftover could carry looser permissions
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.debug(f"Could not write configuration cache {cache_file}: {e}")
     
-    return logger
+    return config
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
     logger = logging.getLogger(__name__)
+    if matcher is None:
+        # Matcher not imported yet, nothing to shut down
+        logger.info(f"Received signal {signum} during startup, exiting")
+        sys.exit(0)
+    if matcher.SHUTDOWN_EVENT.is_set():
+        # Second signal while already shutting down - force exit
+        logger.warning(f"Received signal {signum} again, forcing exit")
+        os._exit(1)
     logger.info(f"Received signal {signum}, shutting down gracefully...")
-    sys.exit(0)
+    # Let main() finish its current iteration instead of raising SystemExit mid-write
+    matcher.SHUTDOWN_EVENT.set()
 
 def main_daemon():
     """Main daemon function"""
@@ -79,9 +180,17 @@ def main_daemon():
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
     
+    # Import the main matcher
+    global matcher
+    try:
+        matcher = importlib.import_module(MATCHER_MODULE)
+    except ImportError as e:
+        logger.error(f"Failed to import {MATCHER_MODULE}: {e}")
+        sys.exit(1)
+    
     # Load configuration
     try:
-        config = load_config()
+        config = load_config_cached()
         logger.info("Configuration loaded successfully")
     except Exception as e:
         logger.error(f"Failed to load configuration: {e}")
@@ -94,59 +203,23 @@ def main_daemon():
             logger.error(f"Missing required configuration field: {field}")
             sys.exit(1)
     
-    # Check database connectivity
+    # Run the main application. Restarts after a crash are left to systemd
+    # (Restart=on-failure with StartLimitBurst/StartLimitIntervalSec), which
+    # also guarantees a clean process for every attempt.
     try:
-        from sota_rbn_matcher_mysql import DatabaseManager
-        db_config = config.get('credentials', {}).get('mysql', {})
-        db_manager = DatabaseManager(
-            host=db_config.get('host', 'localhost'),
-            port=db_config.get('port', 3306),
-            user=db_config.get('user', 'root'),
-            password=db_config.get('password', ''),
-            database=db_config.get('database', 'spots'),
-            my_callsign=config['callsigns']['my_callsign'],
-            qrz_username=config['credentials']['qrz']['username'],
-            qrz_password=config['credentials']['qrz']['password']
-        )
-        logger.info("Database connection established")
-    except Exception as e:
-        logger.error(f"Failed to connect to database: {e}")
-        sys.exit(1)
-    
-    # Run the main application
-    restart_count = 0
-    max_restarts = 10
-    restart_window = 3600  # 1 hour
-    restart_times = []
-    
-    while True:
-        try:
-            logger.info(f"Starting SOTA RBN Matcher (attempt {restart_count + 1})")
-            start_time = time.time()
-            
-            # Run the main function
-            main()
-            
-        except KeyboardInterrupt:
-            logger.info("Received keyboard interrupt, shutting down")
-            break
-        except Exception as e:
-            logger.error(f"Application crashed: {e}")
-            logger.error(f"Traceback: {sys.exc_info()}")
-            
-            # Check restart limits
-            current_time = time.time()
-            restart_times = [t for t in restart_times if current_time - t < restart_window]
-            restart_times.append(current_time)
-            
-            if len(restart_times) > max_restarts:
-                logger.error(f"Too many restarts in {restart_window} seconds, exiting")
-                sys.exit(1)
-            
-            restart_count += 1
-            logger.info(f"Restarting in 10 seconds... (restart {restart_count})")
-            time.sleep(10)
+        logger.info("Starting SOTA RBN Matcher")
+        matcher.main(config)  # Reuse the loaded config rather than parsing it again
+        logger.info("SOTA RBN Matcher stopped")
+    except matcher.ConfigError as e:
+        # Permanent failure - RestartPreventExitStatus=2 stops systemd retrying
+        logger.error(f"Configuration error: {e}")
+        sys.exit(2)
 
 if __name__ == "__main__":
-    main_daemon()
-
+    try:
+        main_daemon()
+    except Exception:
+        logging.getLogger(__name__).exception("Application crashed")
+        sys.exit(1)
+    finally:
+        stop_logging()
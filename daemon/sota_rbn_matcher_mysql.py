@@ -4,23 +4,57 @@ SOTA and RBN Spot Matcher with QRZ Integration
 Pulls spots from SOTA cluster and RBN, stores in database, finds matches, and creates maps
 """
 
+import os
 import socket
+import sys
+import bisect
 import pymysql
 import threading
 import time
 import re
 import logging
-import traceback
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Dict
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple, Dict
 import queue
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import math
+import numpy as np
 import xml.etree.ElementTree as ET
+from io import BytesIO
 from urllib.parse import urlencode
 
+try:
+    import orjson
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # orjson is optional; it only speeds up map generation
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj)
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; NumPy is used for every batch size without it
+    njit = None
+
+class ConfigError(Exception):
+    """Configuration problem that a restart will not fix"""
+
+class TransientError(Exception):
+    """Temporary failure (e.g. database unavailable) worth retrying"""
+
+# MySQL errors caused by bad credentials or database name rather than an outage
+_MYSQL_CONFIG_ERRORS = (1044, 1045, 1049)
+
+# Set by the daemon wrapper's signal handler to request a clean shutdown of main()
+SHUTDOWN_EVENT = threading.Event()
+
 def load_config(config_file: str = "config.json") -> Dict:
     """Load configuration from JSON file"""
     try:
@@ -43,40 +77,182 @@ def configure_logging(debug: bool = False):
 configure_logging(debug=False)
 logger = logging.getLogger(__name__)
 
-@dataclass
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_vec(lat1, lon1, lat2, lon2, R: float = EARTH_RADIUS_KM) -> np.ndarray:
+    """Great-circle distances in kilometers between arrays of points (degrees)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    # Work in place on the radian copies to keep the number of temporaries down
+    a = np.subtract(lat2, lat1)
+    a *= 0.5
+    np.sin(a, out=a)
+    a *= a
+    dlon = np.subtract(lon2, lon1, out=lon2)
+    dlon *= 0.5
+    np.sin(dlon, out=dlon)
+    dlon *= dlon
+    np.cos(lat1, out=lat1)
+    np.cos(lat2, out=lat2)
+    dlon *= lat1
+    dlon *= lat2
+    a += dlon
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * R
+    return a
+
+# Above this many pairs the parallel Numba kernel pays for its thread start-up
+NUMBA_PARALLEL_MIN_BATCH = 2048
+
+def _njit_cached(**options):
+    """njit with the on-disk cache when a writable cache directory exists, plain njit otherwise"""
+    def decorate(func):
+        try:
+            return njit(cache=True, **options)(func)
+        except RuntimeError:  # "no locator available", e.g. read-only install dir without NUMBA_CACHE_DIR
+            return njit(**options)(func)
+    return decorate
+
+if njit is not None:
+    @_njit_cached(fastmath=True, inline='always')
+    def _haversine_one(lat1, lon1, lat2, lon2):
+        """Haversine distance in kilometers for a single pair of points (degrees)"""
+        phi1 = math.radians(lat1)
+        phi2 = math.radians(lat2)
+        dphi = phi2 - phi1
+        dlam = math.radians(lon2 - lon1)
+        a = math.sin(dphi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2)**2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+    
+    @_njit_cached(fastmath=True)
+    def _haversine_numba_serial(lat1, lon1, lat2, lon2, out):
+        """Haversine kernel writing kilometers into out; no temporaries, no thread pool"""
+        for i in range(out.shape[0]):
+            out[i] = _haversine_one(lat1[i], lon1[i], lat2[i], lon2[i])
+    
+    @_njit_cached(parallel=True, fastmath=True)
+    def _haversine_numba(lat1, lon1, lat2, lon2, out):
+        """Haversine kernel writing kilometers into out, spread over all cores"""
+        for i in prange(out.shape[0]):
+            out[i] = _haversine_one(lat1[i], lon1[i], lat2[i], lon2[i])
+else:
+    _haversine_numba_serial = _haversine_numba = None
+
+def haversine_bulk(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Great-circle distances in kilometers, using the Numba kernels when available"""
+    if _haversine_numba is None:
+        return haversine_vec(lat1, lon1, lat2, lon2)
+    n = lat1.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    if n > NUMBA_PARALLEL_MIN_BATCH:
+        _haversine_numba(lat1, lon1, lat2, lon2, out)
+    else:
+        _haversine_numba_serial(lat1, lon1, lat2, lon2, out)
+    return out
+
+def great_circle_points(lat1: np.ndarray, lon1: np.ndarray, lat2: np.ndarray, lon2: np.ndarray,
+                        num_points: int = 50) -> np.ndarray:
+    """Great-circle polylines between point pairs as an (n, num_points + 1, 2) array of [lon, lat]"""
+    phi1, lam1, phi2, lam2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    
+    # Unit vectors for both endpoints, shape (n, 3)
+    p1 = np.stack([np.cos(phi1) * np.cos(lam1), np.cos(phi1) * np.sin(lam1), np.sin(phi1)], axis=-1)
+    p2 = np.stack([np.cos(phi2) * np.cos(lam2), np.cos(phi2) * np.sin(lam2), np.sin(phi2)], axis=-1)
+    d = np.arccos(np.clip(np.einsum('ij,ij->i', p1, p2), -1.0, 1.0))[:, None]
+    
+    # Spherical linear interpolation; coincident endpoints fall back to plain weights
+    f = np.linspace(0.0, 1.0, num_points + 1)[None, :]
+    sin_d = np.sin(d)
+    safe = sin_d > 1e-12
+    sin_d = np.where(safe, sin_d, 1.0)
+    a = np.where(safe, np.sin((1 - f) * d) / sin_d, 1 - f)
+    b = np.where(safe, np.sin(f * d) / sin_d, f)
+    xyz = a[..., None] * p1[:, None, :] + b[..., None] * p2[:, None, :]
+    
+    lat = np.degrees(np.arctan2(xyz[..., 2], np.hypot(xyz[..., 0], xyz[..., 1])))
+    # Unwrap longitudes so lines crossing the antimeridian stay continuous;
+    # split_antimeridian cuts them back into the map range for drawing
+    lon = np.degrees(np.unwrap(np.arctan2(xyz[..., 1], xyz[..., 0]), axis=1))
+    return np.stack([lon, lat], axis=-1)
+
+def split_antimeridian(line: np.ndarray) -> List[List[List[float]]]:
+    """Split an unwrapped [lon, lat] polyline at ±180 into MultiLineString parts within the map"""
+    # Unwrapping starts at a longitude in range, so a line under half the
+    # globe leaves [-180, 180] at most once, and then stays out
+    outside = np.flatnonzero(np.abs(line[:, 0]) > 180.0)
+    if not len(outside):
+        return [line.tolist()]
+    k = outside[0]
+    (lon_a, lat_a), (lon_b, lat_b) = line[k - 1], line[k]
+    edge = 180.0 if lon_b > 0 else -180.0
+    lat_edge = round(float(lat_a + (lat_b - lat_a) * (edge - lon_a) / (lon_b - lon_a)), 4)
+    rest = line[k:].copy()
+    rest[:, 0] -= 2 * edge
+    return [line[:k].tolist() + [[edge, lat_edge]], [[-edge, lat_edge]] + rest.tolist()]
+
+def create_http_session() -> requests.Session:
+    """Create a keep-alive HTTP session with a connection pool and retries"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+    )
+    session.mount("https://", adapter)
+    return session
+
+def _normalize_call(callsign: str) -> str:
+    """Upper-case a callsign and drop any /P, /M style suffix"""
+    return callsign.upper().partition('/')[0]
+
+# slots=True drops the per-instance __dict__ (Python 3.10+; plain dataclasses on 3.9)
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_DATACLASS_OPTIONS)
 class Location:
     latitude: float
     longitude: float
     name: str = ""
     
-    def distance_to(self, other: 'Location') -> float:
-        """Calculate distance in kilometers using Haversine formula"""
-        R = 6371  # Earth's radius in km
-        
+    def _a_term(self, other: 'Location') -> float:
+        """Haversine sin²(Δ/2) term - monotonic in distance, so fine for ranking"""
         lat1, lon1 = math.radians(self.latitude), math.radians(self.longitude)
         lat2, lon2 = math.radians(other.latitude), math.radians(other.longitude)
         
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        return R * c
+        return math.sin((lat2 - lat1) / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2)**2
+    
+    def distance_to(self, other: 'Location') -> float:
+        """Calculate distance in kilometers using Haversine formula"""
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(self._a_term(other)))
 
-@dataclass
-class PropagationPath:
-    sota_summit: str
-    sota_location: Location
-    rbn_spotter: str
-    rbn_location: Location
-    frequency: float
-    distance_km: float
-    timestamp: datetime
-    snr: int
-    callsign: str
+@dataclass(**_DATACLASS_OPTIONS)
+class PropagationPaths:
+    """Propagation paths stored column-wise, one array or list entry per path"""
+    callsign: List[str]
+    sota_summit: List[str]
+    sota_name: List[str]
+    rbn_spotter: List[str]
+    rbn_name: List[str]
+    sota_lat: np.ndarray
+    sota_lon: np.ndarray
+    rbn_lat: np.ndarray
+    rbn_lon: np.ndarray
+    frequency: np.ndarray
+    snr: np.ndarray
+    distance_km: np.ndarray
+    timestamp: np.ndarray  # datetime64[s], UTC
+    
+    def __len__(self) -> int:
+        return len(self.callsign)
+    
+    @classmethod
+    def empty(cls) -> 'PropagationPaths':
+        """Container with no paths"""
+        none = np.empty(0, dtype=np.float64)
+        return cls([], [], [], [], [], none, none, none, none, none, none, none,
+                   np.empty(0, dtype='datetime64[s]'))
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SOTASpot:
     callsign: str
     frequency: float
@@ -85,7 +261,7 @@ class SOTASpot:
     timestamp: datetime
     spotter: str
     
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class RBNSpot:
     callsign: str
     frequency: float
@@ -94,14 +270,119 @@ class RBNSpot:
     spotter: str
     mode: str = "CW"  # RBN is primarily CW
 
+# Rough callsign prefix locations - a simplified mapping, in practice you'd
+# want a more complete database
+_PREFIX_TABLE = [
+    ('W1', 42.3601, -71.0589, 'New England'),
+    ('W2', 40.7128, -74.0060, 'New York/New Jersey'),
+    ('W3', 39.9526, -75.1652, 'Pennsylvania/Delaware'),
+    ('W4', 33.7490, -84.3880, 'Southeast US'),
+    ('W5', 32.7767, -96.7970, 'South Central US'),
+    ('W6', 34.0522, -118.2437, 'California'),
+    ('W7', 47.6062, -122.3321, 'Pacific Northwest'),
+    ('W8', 41.4993, -81.6944, 'Great Lakes'),
+    ('W9', 41.8781, -87.6298, 'Midwest'),
+    ('W0', 39.7391, -104.9847, 'Mountain/Plains'),
+    ('VE1', 44.6488, -63.5752, 'Nova Scotia'),
+    ('VE2', 45.5017, -73.5673, 'Quebec'),
+    ('VE3', 43.6532, -79.3832, 'Ontario'),
+    ('VE4', 49.8951, -97.1384, 'Manitoba'),
+    ('VE5', 52.1332, -106.6700, 'Saskatchewan'),
+    ('VE6', 51.0447, -114.0719, 'Alberta'),
+    ('VE7', 49.2827, -123.1207, 'British Columbia'),
+    ('G', 51.5074, -0.1278, 'England'),
+    ('GM', 55.9533, -3.1883, 'Scotland'),
+    ('GW', 51.4816, -3.1791, 'Wales'),
+    ('EI', 53.3498, -6.2603, 'Ireland'),
+    ('ON', 50.8503, 4.3517, 'Belgium'),
+    ('PA', 52.3676, 4.9041, 'Netherlands'),
+    ('DL', 52.5200, 13.4050, 'Germany'),
+    ('F', 48.8566, 2.3522, 'France'),
+    ('JA', 35.6762, 139.6503, 'Japan'),
+    ('HL', 37.5665, 126.9780, 'South Korea'),
+    ('VK', -33.8688, 151.2093, 'Australia'),
+]
+_PREFIX_TABLE.sort()
+# Stored as parallel arrays sorted by prefix for bisect lookups
+_PREFIXES = [row[0] for row in _PREFIX_TABLE]
+_PREFIX_LATS = np.array([row[1] for row in _PREFIX_TABLE], dtype=np.float64)
+_PREFIX_LONS = np.array([row[2] for row in _PREFIX_TABLE], dtype=np.float64)
+_PREFIX_NAMES = [row[3] for row in _PREFIX_TABLE]
+del _PREFIX_TABLE
+
+# US call areas indexed by region digit, for K/N/A calls not in the table
+_US_REGIONS = (
+    (39.7391, -104.9847, 'Mountain/Plains'),
+    (42.3601, -71.0589, 'New England'),
+    (40.7128, -74.0060, 'New York/New Jersey'),
+    (39.9526, -75.1652, 'Pennsylvania/Delaware'),
+    (33.7490, -84.3880, 'Southeast US'),
+    (32.7767, -96.7970, 'South Central US'),
+    (34.0522, -118.2437, 'California'),
+    (47.6062, -122.3321, 'Pacific Northwest'),
+    (41.4993, -81.6944, 'Great Lakes'),
+    (41.8781, -87.6298, 'Midwest'),
+)
+
+def _longest_prefix_index(callsign: str) -> int:
+    """Index into _PREFIXES of the longest prefix of callsign, or -1"""
+    key = callsign
+    while key:
+        i = bisect.bisect_right(_PREFIXES, key) - 1
+        if i < 0:
+            return -1
+        prefix = _PREFIXES[i]
+        if key.startswith(prefix):
+            return i
+        # Any shorter matching prefix must also be a prefix of the common part
+        n = 0
+        for a, b in zip(prefix, key):
+            if a != b:
+                break
+            n += 1
+        key = key[:n]
+    return -1
+
+QRZ_NS = '{http://xmldata.qrz.com}'
+
+# Maidenhead character lookup tables indexed by byte value; letters are
+# case-insensitive and anything else maps to 255. Fields run A-R,
+# subsquares A-X.
+_GRID_FIELD = bytes(
+    (c - 65) if 65 <= c <= 82 else (c - 97) if 97 <= c <= 114 else 255
+    for c in range(256)
+)
+_GRID_LETTER = bytes(
+    (c - 65) if 65 <= c <= 88 else (c - 97) if 97 <= c <= 120 else 255
+    for c in range(256)
+)
+_GRID_DIGIT = bytes((c - 48) if 48 <= c <= 57 else 255 for c in range(256))
+
+def _find_qrz_element(content: bytes, *tags: str) -> Optional[ET.Element]:
+    """Return the first QRZ element with one of the given tags, stopping the parse there"""
+    wanted = {QRZ_NS + tag for tag in tags}
+    try:
+        for _, elem in ET.iterparse(BytesIO(content), events=('end',)):
+            if elem.tag in wanted:
+                return elem
+    except ET.ParseError as e:
+        logger.debug(f"Could not parse QRZ response: {e}")
+    return None
+
 class QRZLookup:
     def __init__(self, username: str = "", password: str = ""):
         self.username = username
         self.password = password
         self.session_key = None
-        self.last_login = None
         self.session_timeout = 3600  # 1 hour
+        self._session_deadline = 0.0  # time.monotonic() when the session expires
         self.base_url = "https://xmldata.qrz.com/xml/current/"
+        self.session = create_http_session()
+        # callsign -> (monotonic time cached, result or None for not found)
+        self._call_cache: Dict[str, Tuple[float, Optional[Dict]]] = {}
+        self.cache_ttl = 30 * 86400  # QRZ data is near-static
+        self.negative_cache_ttl = 3600  # Retry unknown callsigns hourly
+        self._login_lock = threading.Lock()
         
     def _login(self) -> bool:
         """Login to QRZ and get session key"""
@@ -124,55 +405,47 @@ class QRZLookup:
     <ns0:Remark>cpu: 0.013s</ns0:Remark>
   </ns0:Session>
 </ns0:QRZDatabase>"""
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             
-            root = ET.fromstring(response.content)
-            ET.indent(root)
-
-            # Convert to string and print
-            logger.debug(f"QRZ XML response: {ET.tostring(root, encoding='utf-8').decode('utf-8')}")
-            
-            # Use namespace for finding Session element
-            session = root.find('.//ns0:Session', namespaces={'ns0': 'http://xmldata.qrz.com'})
-            if session is not None:
-                logger.debug(f"QRZ Session: {ET.tostring(session, encoding='utf-8').decode('utf-8')}")
-                key_elem = session.find('ns0:Key', namespaces={'ns0': 'http://xmldata.qrz.com'})
-                if key_elem is not None:
-                    self.session_key = key_elem.text
-                    self.last_login = datetime.now()
-                    logger.info("Successfully logged into QRZ XML API")
-                    return True
-                    
-            # Check for error with namespace
-            error = root.find('.//ns0:Error', namespaces={'ns0': 'http://xmldata.qrz.com'})
-            if error is not None:
-                logger.error(f"QRZ login error: {error.text}")
+            elem = _find_qrz_element(response.content, 'Key', 'Error')
+            if elem is not None and elem.tag == QRZ_NS + 'Key':
+                self.session_key = elem.text
+                self._session_deadline = time.monotonic() + self.session_timeout
+                logger.info("Successfully logged into QRZ XML API")
+                return True
+            
+            if elem is not None:
+                logger.error(f"QRZ login error: {elem.text}")
             else:
                 logger.error("QRZ login failed - no session key received")
                 
         except Exception as e:
-            logger.error(f"QRZ login exception: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"QRZ login exception: {e}", exc_info=True)
             
         return False
     
     def _is_session_valid(self) -> bool:
         """Check if current session is still valid"""
-        if not self.session_key or not self.last_login:
-            return False
-            
-        elapsed = (datetime.now() - self.last_login).total_seconds()
-        return elapsed < self.session_timeout
+        return self.session_key is not None and time.monotonic() < self._session_deadline
     
     def lookup_callsign(self, callsign: str) -> Optional[Dict]:
-        """Lookup callsign details from QRZ"""
-        if not self._is_session_valid():
-            if not self._login():
-                return None
-        
+        """Lookup callsign details from QRZ (results are cached in memory)"""
         # Clean callsign (remove /P, /M, etc.)
-        clean_callsign = callsign.split('/')[0].upper().strip()
+        clean_callsign = _normalize_call(callsign)
+        
+        cached = self._call_cache.get(clean_callsign)
+        if cached is not None:
+            cached_at, result = cached
+            ttl = self.cache_ttl if result is not None else self.negative_cache_ttl
+            if time.monotonic() - cached_at < ttl:
+                return result
+        
+        # Lookups run from several enrichment threads; only one of them logs in
+        with self._login_lock:
+            if not self._is_session_valid():
+                if not self._login():
+                    return None
         
         try:
             params = {
@@ -180,13 +453,13 @@ class QRZLookup:
                 'callsign': clean_callsign
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             response.raise_for_status()
             
-            root = ET.fromstring(response.content)
-            callsign_data = root.find('.//ns0:Callsign', namespaces={'ns0': 'http://xmldata.qrz.com'})
+            elem = _find_qrz_element(response.content, 'Callsign', 'Error')
             
-            if callsign_data is not None:
+            if elem is not None and elem.tag == QRZ_NS + 'Callsign':
+                callsign_data = elem
                 data = {}
                 for elem in callsign_data:
                     # Remove namespace prefix from tag name
@@ -221,42 +494,49 @@ class QRZLookup:
                         result['latitude'] = lat
                         result['longitude'] = lon
                 
+                self._call_cache[clean_callsign] = (time.monotonic(), result)
                 return result
             
-            # Check for error with namespace
-            error = root.find('.//ns0:Error', namespaces={'ns0': 'http://xmldata.qrz.com'})
-            if error is not None:
-                logger.debug(f"QRZ lookup error for {clean_callsign}: {error.text}")
+            if elem is not None:
+                logger.debug(f"QRZ lookup error for {clean_callsign}: {elem.text}")
+                if elem.text and 'session' in elem.text.lower():
+                    # Session expired on the QRZ side - log in again next time
+                    self.session_key = None
+                else:
+                    self._call_cache[clean_callsign] = (time.monotonic(), None)
                 
         except Exception as e:
-            logger.debug(f"QRZ lookup exception for {clean_callsign}: {e}")
-            logger.debug(f"Traceback: {traceback.format_exc()}")
+            logger.debug(f"QRZ lookup exception for {clean_callsign}: {e}", exc_info=True)
             
         return None
     
-    def _grid_to_coordinates(self, grid: str) -> Tuple[Optional[float], Optional[float]]:
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _grid_to_coordinates(grid: str) -> Tuple[Optional[float], Optional[float]]:
         """Convert Maidenhead grid square to lat/lon coordinates"""
         if not grid or len(grid) < 4:
             return None, None
             
         try:
-            grid = grid.upper()
+            g = grid.encode('ascii')
             
-            # Extract field, square, and subsquare
-            field_lon = ord(grid[0]) - ord('A')
-            field_lat = ord(grid[1]) - ord('A') 
-            square_lon = int(grid[2])
-            square_lat = int(grid[3])
+            # Extract field, square, and subsquare (255 marks an invalid character)
+            field_lon = _GRID_FIELD[g[0]]
+            field_lat = _GRID_FIELD[g[1]]
+            square_lon = _GRID_DIGIT[g[2]]
+            square_lat = _GRID_DIGIT[g[3]]
+            if 255 in (field_lon, field_lat, square_lon, square_lat):
+                return None, None
             
             # Calculate base coordinates (SW corner of square)
             lon = -180 + (field_lon * 20) + (square_lon * 2)
             lat = -90 + (field_lat * 10) + (square_lat * 1)
             
             # Add offset to get center of square
-            if len(grid) >= 6:
+            subsq_lon = _GRID_LETTER[g[4]] if len(g) >= 6 else 255
+            subsq_lat = _GRID_LETTER[g[5]] if len(g) >= 6 else 255
+            if subsq_lon != 255 and subsq_lat != 255:
                 # Have subsquare, use center of subsquare
-                subsq_lon = ord(grid[4]) - ord('A')
-                subsq_lat = ord(grid[5]) - ord('A')
                 lon += (subsq_lon * 2/24) + (1/24)  # Center of subsquare
                 lat += (subsq_lat * 1/24) + (1/48)  # Center of subsquare
             else:
@@ -269,6 +549,401 @@ class QRZLookup:
         except (ValueError, IndexError):
             return None, None
 
+# Statements run for every spot or location lookup. pymysql interpolates
+# parameters client-side, so keeping them as module constants mostly saves
+# rebuilding the strings; executemany folds INSERT_RBN_SPOT_SQL into a
+# multi-row INSERT.
+INSERT_SOTA_SPOT_SQL = """
+    INSERT IGNORE INTO sota_spots 
+    (callsign, frequency, summit, comment, timestamp, spotter)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_RBN_SPOT_SQL = """
+    INSERT IGNORE INTO rbn_spots 
+    (callsign, frequency, snr, timestamp, spotter, mode, is_my_callsign, keep_permanent)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+SELECT_SOTA_LOCATION_SQL = """
+    SELECT latitude, longitude, name FROM sota_locations 
+    WHERE summit_ref = %s
+"""
+
+SELECT_RBN_LOCATION_SQL = """
+    SELECT latitude, longitude, name, source, last_updated FROM rbn_locations 
+    WHERE spotter = %s
+"""
+
+# Match every SOTA/RBN spot pair within the time and frequency windows in one
+# statement. The time window is a range on r.timestamp so idx_rbn_call_ts can
+# drive the join; the matches unique key makes already-matched pairs no-ops.
+INSERT_NEW_MATCHES_SQL = """
+    INSERT IGNORE INTO matches 
+    (sota_id, rbn_id, sota_spotter, rbn_spotter, time_diff_seconds, freq_diff_hz, match_timestamp)
+    SELECT 
+        s.id, 
+        r.id,
+        s.spotter,
+        r.spotter,
+        TIMESTAMPDIFF(SECOND, s.timestamp, r.timestamp),
+        ROUND((r.frequency - s.frequency) * 1000000),
+        UTC_TIMESTAMP()
+    FROM sota_spots s
+    JOIN rbn_spots r ON (
+        r.callsign = s.callsign AND
+        r.timestamp BETWEEN s.timestamp - INTERVAL %s SECOND
+                        AND s.timestamp + INTERVAL %s SECOND AND
+        ABS(s.frequency - r.frequency) <= %s
+    )
+    LEFT JOIN matches m ON (m.sota_id = s.id AND m.rbn_id = r.id)
+    WHERE s.timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
+    AND r.timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
+    AND m.id IS NULL
+"""
+
+# Unmatched RBN spots past an id whose callsign has a SOTA spot within the
+# time window; a primary key range on r and idx_sota_call_ts on s
+SELECT_NEW_RBN_MATCH_CANDIDATES_SQL = """
+    SELECT DISTINCT r.id, r.callsign
+    FROM rbn_spots r
+    JOIN sota_spots s ON (
+        s.callsign = r.callsign AND
+        s.timestamp BETWEEN r.timestamp - INTERVAL %s SECOND
+                        AND r.timestamp + INTERVAL %s SECOND
+    )
+    WHERE r.id > %s
+    AND r.is_sota_matched = FALSE
+"""
+
+# Flag RBN spots that appear in matches so cleanup_old_rbn_spots keeps them.
+# The matches FK indexes on rbn_id/sota_id drive these joins.
+MARK_RBN_MATCHED_SQL = """
+    UPDATE rbn_spots SET is_sota_matched = TRUE, keep_permanent = TRUE
+    WHERE id = %s
+"""
+
+MARK_RBN_MATCHED_FOR_SOTA_SQL = """
+    UPDATE rbn_spots r JOIN matches m ON m.rbn_id = r.id
+    SET r.is_sota_matched = TRUE, r.keep_permanent = TRUE
+    WHERE m.sota_id = %s
+"""
+
+MARK_ALL_RBN_MATCHED_SQL = """
+    UPDATE rbn_spots r JOIN matches m ON m.rbn_id = r.id
+    SET r.is_sota_matched = TRUE, r.keep_permanent = TRUE
+    WHERE r.is_sota_matched = FALSE
+"""
+
+# Fingerprint of the matches in a time window. Match ids only grow and
+# match_timestamp is the insert time, so the set is unchanged while the id
+# part is; the enhancement part changes when enrichment resolves locations
+# for matches that may have been left off the map for lack of one.
+MATCH_WINDOW_KEY_SQL = """
+    SELECT COUNT(*) as n, MIN(id) as first_id, MAX(id) as last_id,
+           COUNT(location_enhancement_timestamp) as n_enhanced,
+           MAX(location_enhancement_timestamp) as last_enhanced
+    FROM matches
+    WHERE match_timestamp > DATE_SUB(NOW(), INTERVAL %s MINUTE)
+"""
+
+# Report queries, run with the same text on every refresh. The matches of a
+# window come back with their spot details and any cached locations.
+SELECT_WINDOW_MATCHES_SQL = """
+    SELECT 
+        s.callsign,
+        s.summit,
+        s.frequency as sota_freq,
+        r.frequency as rbn_freq,
+        s.timestamp as sota_timestamp,
+        r.timestamp as rbn_timestamp,
+        m.time_diff_seconds,
+        m.freq_diff_hz,
+        m.sota_spotter,
+        m.rbn_spotter,
+        r.spotter,
+        r.snr,
+        TIMESTAMPDIFF(SECOND, '1970-01-01', m.match_timestamp) as match_epoch,
+        sl.latitude as sota_lat,
+        sl.longitude as sota_lon,
+        sl.name as sota_name,
+        rl.latitude as rbn_lat,
+        rl.longitude as rbn_lon,
+        rl.name as rbn_name
+    FROM matches m
+    JOIN sota_spots s ON m.sota_id = s.id
+    JOIN rbn_spots r ON m.rbn_id = r.id
+    LEFT JOIN sota_locations sl ON sl.summit_ref = s.summit
+    LEFT JOIN rbn_locations rl ON (
+        rl.spotter = UPPER(SUBSTRING_INDEX(r.spotter, '-', 1)) AND
+        (rl.source = 'qrz' OR rl.last_updated > DATE_SUB(NOW(), INTERVAL 30 DAY))
+    )
+    WHERE m.match_timestamp > DATE_SUB(NOW(), INTERVAL %s MINUTE)
+    ORDER BY m.match_timestamp DESC
+"""
+
+SELECT_MY_CALLSIGN_SPOTS_SQL = """
+    SELECT callsign, frequency, snr, timestamp, spotter, mode
+    FROM rbn_spots 
+    WHERE callsign = %s 
+    AND timestamp >= DATE_SUB(NOW(), INTERVAL %s MINUTE)
+    ORDER BY timestamp DESC
+"""
+
+COUNT_MY_CALLSIGN_SPOTS_SQL = """
+    SELECT COUNT(*) as n FROM rbn_spots 
+    WHERE callsign = %s 
+    AND timestamp >= DATE_SUB(NOW(), INTERVAL %s MINUTE)
+"""
+
+# Map line colors: 40m and below, 20m, 15m, 12/10m, 6m and above (RBN frequencies in kHz)
+MAP_BAND_EDGES_KHZ = np.array([7500, 14500, 21500, 29000], dtype=np.float64)
+MAP_BAND_COLORS = np.array(['#ff2222', '#ff8844', '#ffff44', '#44ff44', '#4444ff'])
+BAND_LABELS = ['40m and below', '20m', '15m', '12m/10m', '6m and above']
+# Map line weight 1-8 from SNR in 5 dB steps
+MAP_SNR_WEIGHT_EDGES = np.array([5, 10, 15, 20, 25, 30, 35], dtype=np.float64)
+
+# Static parts of the propagation map page; _create_map_html only formats the
+# small dynamic pieces between them and the path data is streamed after MAP_HTML_SCRIPT
+MAP_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <title>SOTA-RBN Propagation Map</title>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta http-equiv="refresh" content="60">
+    <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
+    <style>
+        body { margin: 0; padding: 0; font-family: Arial, sans-serif; }
+        #map { height: 100vh; }
+        .info-panel {
+            position: absolute;
+            top: 10px;
+            right: 10px;
+            background: white;
+            padding: 15px;
+            border-radius: 5px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            z-index: 1000;
+            max-width: 300px;
+        }
+        .path-info {
+            margin-bottom: 10px;
+            padding: 8px;
+            border-left: 4px solid #3388ff;
+            background: #f8f9fa;
+        }
+        .legend {
+            position: absolute;
+            bottom: 30px;
+            right: 10px;
+            background: white;
+            padding: 10px;
+            border-radius: 5px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            z-index: 1000;
+        }
+        .legend-item {
+            display: flex;
+            align-items: center;
+            margin: 5px 0;
+        }
+        .legend-color {
+            width: 20px;
+            height: 3px;
+            margin-right: 10px;
+        }
+        .legend-circle {
+            width: 12px;
+            height: 12px;
+            border-radius: 50%;
+            margin-right: 10px;
+            border: 2px solid;
+        }
+        #timestamp-info {
+            margin: 8px 0;
+            padding: 5px;
+            background: #f8f9fa;
+            border-radius: 3px;
+            font-size: 0.85em;
+            color: #666;
+        }
+    </style>
+</head>
+<body>
+    <div id="map"></div>
+    
+    <div class="info-panel">
+        <h3>SOTA-RBN Propagation Paths</h3>
+        <div id="stats">
+"""
+
+MAP_HTML_LEGEND = """            <span id="selected-info">Click a path for details</span>
+        </div>
+    </div>
+    
+    <div class="legend">
+        <h4>Legend</h4>
+        <div class="legend-item">
+            <div class="legend-circle" style="background: #ff4444; border-color: #ff0000;"></div>
+            <span>🏔️ SOTA Summit</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-circle" style="background: #4444ff; border-color: #0000ff;"></div>
+            <span>📡 RBN Spotter</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-color" style="background: #ff2222;"></div>
+            <span>📶 40m & below</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-color" style="background: #ff8844;"></div>
+            <span>📶 20m</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-color" style="background: #ffff44;"></div>
+            <span>📶 15m</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-color" style="background: #44ff44;"></div>
+            <span>📶 12/10m</span>
+        </div>
+        <div class="legend-item">
+            <div class="legend-color" style="background: #4444ff;"></div>
+            <span>📶 6m & above</span>
+        </div>
+    </div>
+
+    <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+"""
+
+MAP_HTML_SCRIPT = """        // Initialize map straight at its final view so only those tiles are fetched
+        var map = L.map('map');
+        if (bounds) {
+            map.fitBounds(bounds, {padding: [40, 40]});
+        } else {
+            map.setView(center, 4);
+        }
+        
+        // Add tile layer
+        L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+            attribution: '© OpenStreetMap contributors'
+        }).addTo(map);
+        
+        // Path data
+        var paths = """
+
+MAP_HTML_TAIL = """;
+        
+        function updateAge() {
+            var now = new Date();
+            var ageMs = now - pageGeneratedTime;
+            var ageMinutes = Math.floor(ageMs / (1000 * 60));
+            var ageHours = Math.floor(ageMinutes / 60);
+            var ageDays = Math.floor(ageHours / 24);
+            
+            var ageText;
+            if (ageDays > 0) {
+                ageText = ageDays + ' day' + (ageDays > 1 ? 's' : '') + ' ago';
+            } else if (ageHours > 0) {
+                ageText = ageHours + ' hour' + (ageHours > 1 ? 's' : '') + ' ago';
+            } else {
+                ageText = ageMinutes + ' minute' + (ageMinutes > 1 ? 's' : '') + ' ago';
+            }
+            
+            document.getElementById('age-display').textContent = ageText;
+        }
+        
+        // Update age immediately and then every minute
+        updateAge();
+        setInterval(updateAge, 60000);
+        
+        // Draw everything on one canvas instead of an SVG element per feature
+        var renderer = L.canvas({ padding: 0.5 });
+        
+        // One marker per distinct summit and spotter, however many paths share it;
+        // their popups only show marker-level fields, per-path ones are on the lines
+        var summitsSeen = {};
+        var spottersSeen = {};
+        var features = [];
+        
+        paths.forEach(function(path) {
+            if (!summitsSeen[path.summit]) {
+                summitsSeen[path.summit] = true;
+                L.circleMarker([path.summit_lat, path.summit_lon], {
+                    renderer: renderer,
+                    radius: 4,
+                    color: '#ff0000',
+                    fillColor: '#ff4444',
+                    fillOpacity: 0.8
+                }).addTo(map).bindPopup(`
+                    <strong>🏔️ SOTA Summit</strong><br>
+                    <strong>${path.summit}</strong><br>
+                    ${path.summit_name}<br>
+                    <br>
+                    <a href="https://sotl.as/summits/${path.summit}" target="_blank">📋 View on SOTL.AS</a>
+                `);
+            }
+            
+            if (!spottersSeen[path.spotter]) {
+                spottersSeen[path.spotter] = true;
+                L.circleMarker([path.spotter_lat, path.spotter_lon], {
+                    renderer: renderer,
+                    radius: 3,
+                    color: '#0000ff',
+                    fillColor: '#4444ff',
+                    fillOpacity: 0.8
+                }).addTo(map).bindPopup(`
+                    <strong>📡 RBN Spotter</strong><br>
+                    <strong>${path.spotter}</strong><br>
+                    ${path.spotter_name}
+                `);
+            }
+            
+            // Propagation path line (great circle, computed when the map was generated)
+            features.push({
+                type: 'Feature',
+                geometry: { type: 'MultiLineString', coordinates: path.coords },
+                properties: path
+            });
+        });
+        
+        // All propagation paths as a single GeoJSON layer
+        var pathLayer = L.geoJSON({ type: 'FeatureCollection', features: features }, {
+            renderer: renderer,
+            style: function(feature) {
+                return { color: feature.properties.color, weight: feature.properties.weight, opacity: 0.7 };
+            }
+        }).addTo(map);
+        
+        // One click handler and one tooltip for the whole layer, resolved per path
+        pathLayer.on('click', function(e) {
+            var path = e.layer.feature.properties;
+            document.getElementById('selected-info').innerHTML = `
+                <div class="path-info">
+                    <strong>${path.callsign}</strong> on <strong>${path.summit}</strong><br>
+                    📡 Heard by: ${path.spotter}<br>
+                    📶 Frequency: ${path.frequency.toFixed(1)} kHz<br>
+                    📏 Distance: ${path.distance} km<br>
+                    📊 SNR: ${path.snr} dB<br>
+                    🕐 Time: ${path.timestamp}<br>
+                    <a href="https://sotl.as/activators/${path.callsign}" target="_blank">SOTL.as Activator Profile</a>
+                </div>
+            `;
+        });
+        
+        pathLayer.bindTooltip(function(layer) {
+            var path = layer.feature.properties;
+            return `
+                ${path.callsign} → ${path.spotter}<br>
+                ${path.frequency.toFixed(1)} kHz, ${path.distance} km<br>
+                ${path.snr} dB
+            `;
+        }, { sticky: true });
+    </script>
+</body>
+</html>"""
+
 class DatabaseManager:
     def __init__(self, host: str = "localhost", port: int = 3306, user: str = "root", password: str = "", 
                  database: str = "spots", my_callsign: str = "", qrz_username: str = "", qrz_password: str = ""):
@@ -277,21 +952,61 @@ class DatabaseManager:
         self.user = user
         self.password = password
         self.database = database
-        self.my_callsign = my_callsign.upper()
+        self.my_callsign = my_callsign.strip().upper()
+        # Accepted spellings of my callsign, with and without a /suffix
+        self._my_variants = frozenset(v for v in (self.my_callsign, _normalize_call(self.my_callsign)) if v)
         self.qrz = QRZLookup(qrz_username, qrz_password)
+        self.http_session = create_http_session()
+        # Kept small to stay polite to QRZ; each worker reuses its own DB connection
+        self.qrz_workers = 4
+        self._qrz_executor = ThreadPoolExecutor(max_workers=self.qrz_workers, thread_name_prefix="qrz")
+        self.ping_interval = 60  # Check idle connections before reuse
+        self._local = threading.local()
+        self.rbn_batch_size = 500
+        # Summit/spotter locations recur across many matches; keep recent ones in memory
+        self._summit_locations: Dict[str, Tuple[float, Location]] = {}
+        self._spotter_locations: Dict[str, Tuple[float, Location]] = {}
+        self.location_cache_size = 4096
+        self.location_cache_ttl = 86400
+        # Shared by the QRZ worker threads; held only around cache reads and writes
+        self._location_cache_lock = threading.Lock()
+        self.rbn_flush_interval = 0.2  # seconds
+        self._rbn_queue = queue.Queue()
+        self._rbn_writer = None
+        self._rbn_writer_lock = threading.Lock()
+        # Called on the RBN writer thread for each spot of my callsign once it is
+        # stored; duplicates dropped by INSERT IGNORE don't trigger it
+        self.on_my_callsign_spot: Callable[[RBNSpot], None] = self._log_my_callsign_spot
+        # Set whenever something the reports show is written (new matches or
+        # spots of my callsign), so readers can skip refreshes with nothing new
+        self.data_changed = threading.Event()
         self.init_database()
     
     def get_connection(self):
-        """Get MySQL database connection"""
-        return pymysql.connect(
-            host=self.host,
-            port=self.port,
-            user=self.user,
-            password=self.password,
-            database=self.database,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
+        """Get this thread's MySQL connection, reconnecting if it was dropped
+        
+        Connections are kept open for the life of each thread and run in autocommit
+        mode so every query sees fresh data; methods that batch writes call begin().
+        """
+        conn = getattr(self._local, 'conn', None)
+        now = time.monotonic()
+        if conn is None or not conn.open:
+            conn = pymysql.connect(
+                host=self.host,
+                port=self.port,
+                user=self.user,
+                password=self.password,
+                database=self.database,
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=True
+            )
+            self._local.conn = conn
+        elif now - self._local.last_used > self.ping_interval:
+            # Idle connections may have hit the server's wait_timeout
+            conn.ping(reconnect=True)
+        self._local.last_used = now
+        return conn
     
     def init_database(self):
         """Initialize the database with required tables"""
@@ -340,6 +1055,7 @@ class DatabaseManager:
                 time_diff_seconds INT,
                 freq_diff_hz INT,
                 match_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE KEY unique_match (sota_id, rbn_id),
                 FOREIGN KEY (sota_id) REFERENCES sota_spots (id) ON DELETE CASCADE,
                 FOREIGN KEY (rbn_id) REFERENCES rbn_spots (id) ON DELETE CASCADE
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
@@ -401,6 +1117,37 @@ class DatabaseManager:
         except:
             pass  # Column already exists
         
+        # One row per SOTA/RBN pair, so INSERT IGNORE can skip pairs already matched.
+        # Tables created before the key existed may hold duplicates; keep the oldest.
+        cursor.execute("SHOW INDEX FROM matches WHERE Key_name = 'unique_match'")
+        if not cursor.fetchall():
+            cursor.execute("""
+                DELETE newer FROM matches newer
+                JOIN matches older ON (
+                    older.sota_id = newer.sota_id AND
+                    older.rbn_id = newer.rbn_id AND
+                    older.id < newer.id
+                )
+            """)
+            if cursor.rowcount:
+                logger.info(f"Removed {cursor.rowcount} duplicate matches")
+            cursor.execute("ALTER TABLE matches ADD UNIQUE KEY unique_match (sota_id, rbn_id)")
+        
+        # Indexes for the matching join, my-callsign lookups and cleanup
+        indexes = [
+            ("rbn_spots", "idx_rbn_call_ts", "callsign, timestamp"),
+            ("sota_spots", "idx_sota_call_ts", "callsign, timestamp"),
+            ("rbn_spots", "idx_rbn_ts_keep", "timestamp, keep_permanent"),
+            ("rbn_spots", "idx_rbn_mycall", "is_my_callsign, timestamp"),
+            ("matches", "idx_match_ts", "match_timestamp"),
+            ("matches", "idx_match_ts_enh", "match_timestamp, location_enhancement_timestamp"),
+        ]
+        for table, index_name, columns in indexes:
+            try:
+                cursor.execute(f"ALTER TABLE {table} ADD INDEX {index_name} ({columns})")
+            except pymysql.err.OperationalError:
+                pass  # Index already exists
+        
         # Locations table for SOTA summits
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS sota_locations (
@@ -430,7 +1177,6 @@ class DatabaseManager:
         """)
         
         conn.commit()
-        conn.close()
     
     def insert_sota_spot(self, spot: SOTASpot) -> Optional[int]:
         """Insert SOTA spot into database"""
@@ -438,20 +1184,14 @@ class DatabaseManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT IGNORE INTO sota_spots 
-                (callsign, frequency, summit, comment, timestamp, spotter)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (spot.callsign, spot.frequency, spot.summit, spot.comment, 
+            cursor.execute(INSERT_SOTA_SPOT_SQL, (spot.callsign, spot.frequency, spot.summit, spot.comment, 
                   spot.timestamp, spot.spotter))
             
             spot_id = cursor.lastrowid
             conn.commit()
-            conn.close()
             return spot_id
         except Exception as e:
-            logger.error(f"Error inserting SOTA spot: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error inserting SOTA spot: {e}", exc_info=True)
             return None
     
     def is_sota_spot_recent(self, spot: SOTASpot, max_age_hours: int = 1) -> bool:
@@ -466,62 +1206,140 @@ class DatabaseManager:
             
             return True
         except Exception as e:
-            logger.error(f"Error checking spot age: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error checking spot age: {e}", exc_info=True)
             return True  # Default to allowing insertion if there's an error
     
-    def insert_rbn_spot(self, spot: RBNSpot) -> Optional[int]:
-        """Insert RBN spot into database with callsign matching logic"""
-        try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            # Check if this is my callsign or has callsign variations
-            is_my_callsign = self._is_my_callsign(spot.callsign)
-            keep_permanent = is_my_callsign  # Always keep my callsign spots
-            
-            cursor.execute("""
-                INSERT IGNORE INTO rbn_spots 
-                (callsign, frequency, snr, timestamp, spotter, mode, is_my_callsign, keep_permanent)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (spot.callsign, spot.frequency, spot.snr, 
-                  spot.timestamp, spot.spotter, spot.mode, is_my_callsign, keep_permanent))
-            
-            spot_id = cursor.lastrowid if cursor.rowcount > 0 else None
+    def insert_rbn_spot(self, spot: RBNSpot):
+        """Queue RBN spot for batched insertion by the writer thread"""
+        if self._rbn_writer is None or not self._rbn_writer.is_alive():
+            self.start_rbn_writer()
+        self._rbn_queue.put((spot, self._is_my_callsign(spot.callsign)))
+    
+    def _log_my_callsign_spot(self, spot: RBNSpot):
+        """Default on_my_callsign_spot handler"""
+        logger.info(f"MY CALLSIGN spotted: {spot.callsign} {spot.frequency:.1f}kHz "
+                   f"{spot.snr}dB by {spot.spotter}")
+    
+    def start_rbn_writer(self):
+        """Start the background thread that batches RBN inserts"""
+        with self._rbn_writer_lock:
+            if self._rbn_writer is None or not self._rbn_writer.is_alive():
+                self._rbn_writer = threading.Thread(target=self._rbn_writer_loop, daemon=True)
+                self._rbn_writer.start()
+    
+    def stop_rbn_writer(self, timeout: float = 5.0):
+        """Flush queued RBN spots and stop the writer thread"""
+        if self._rbn_writer is not None and self._rbn_writer.is_alive():
+            self._rbn_queue.put(None)
+            self._rbn_writer.join(timeout)
+    
+    def stop_qrz_workers(self):
+        """Stop the QRZ lookup threads without waiting for in-flight requests"""
+        self._qrz_executor.shutdown(wait=False)
+    
+    def _rbn_writer_loop(self):
+        """Drain queued RBN spots in batches of up to rbn_batch_size or rbn_flush_interval seconds"""
+        while True:
+            entry = self._rbn_queue.get()
+            if entry is None:
+                return
+            
+            batch = [entry]
+            stopping = False
+            deadline = time.monotonic() + self.rbn_flush_interval
+            while len(batch) < self.rbn_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._rbn_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
             
-            # If we inserted a new spot and it's my callsign, log it specially
-            if spot_id and is_my_callsign:
-                logger.info(f"MY CALLSIGN spotted: {spot.callsign} {spot.frequency:.1f}kHz "
-                           f"{spot.snr}dB by {spot.spotter}")
+            try:
+                # This thread is the only RBN writer, so the batch gets ids above
+                # the current maximum. Location enrichment for new matches is
+                # left to the periodic match loop so QRZ lookups never hold up inserts.
+                after_id = self._last_rbn_spot_id()
+                if self.insert_rbn_spots_bulk(batch):
+                    matches_found = self._find_matches_for_rbn_batch(after_id)
+                    if matches_found > 0:
+                        logger.info(f"Found {matches_found} new matches for {len(batch)} RBN spots")
+            except Exception as e:
+                logger.error(f"Error in RBN writer: {e}", exc_info=True)
             
+            if stopping:
+                return
+    
+    def insert_rbn_spots_bulk(self, spots: List[Tuple[RBNSpot, bool]]) -> int:
+        """Insert a batch of (spot, is_my_callsign) pairs in one transaction"""
+        if not spots:
+            return 0
+        
+        # Spots of my callsign are always kept, and go in one at a time so the
+        # callback only fires for the ones INSERT IGNORE didn't drop
+        rows = []
+        my_spots = []
+        for spot, is_my_callsign in spots:
+            row = (spot.callsign, spot.frequency, spot.snr, spot.timestamp,
+                   spot.spotter, spot.mode, is_my_callsign, is_my_callsign)
+            if is_my_callsign:
+                my_spots.append((spot, row))
+            else:
+                rows.append(row)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            conn.begin()
+            inserted = cursor.executemany(INSERT_RBN_SPOT_SQL, rows) if rows else 0
+            stored_my_spots = [spot for spot, row in my_spots if cursor.execute(INSERT_RBN_SPOT_SQL, row)]
             conn.commit()
-            conn.close()
-            return spot_id
         except Exception as e:
-            logger.error(f"Error inserting RBN spot: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            return None
+            logger.error(f"Error inserting {len(spots)} RBN spots: {e}", exc_info=True)
+            conn.rollback()
+            return 0
+        
+        # Other stations' spots only show up in reports once they match
+        if stored_my_spots:
+            self.data_changed.set()
+        for spot in stored_my_spots:
+            try:
+                self.on_my_callsign_spot(spot)
+            except Exception as e:
+                logger.error(f"Error in my callsign spot callback: {e}", exc_info=True)
+        return inserted + len(stored_my_spots)
+    
+    def _last_rbn_spot_id(self) -> int:
+        """Highest RBN spot id so far, read from the end of the primary key"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) as last_id FROM rbn_spots")
+        return cursor.fetchone()['last_id']
+    
+    def _find_matches_for_rbn_batch(self, after_id: int, time_window_minutes: int = 10) -> int:
+        """Run new-spot matching for RBN spots inserted after after_id that have a SOTA spot nearby"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        time_window_seconds = time_window_minutes * 60
+        cursor.execute(SELECT_NEW_RBN_MATCH_CANDIDATES_SQL, (time_window_seconds, time_window_seconds, after_id))
+        
+        matches_found = 0
+        for row in cursor.fetchall():
+            matches_found += self.find_matches_for_new_spot(row['id'], row['callsign'])
+        return matches_found
     
     def _is_my_callsign(self, callsign: str) -> bool:
         """Check if callsign matches my callsign (including common variations)"""
-        if not self.my_callsign:
+        if not self._my_variants:
             return False
-            
-        callsign = callsign.upper().strip()
-        my_call = self.my_callsign.upper().strip()
-        
-        # Exact match
-        if callsign == my_call:
-            return True
-            
-        # Common variations (/P, /M, /QRP, etc.)
-        base_call = callsign.split('/')[0]  # Remove suffix
-        my_base = my_call.split('/')[0]     # Remove suffix from my call too
         
-        if base_call == my_base or base_call == my_call or callsign == my_base:
-            return True
-            
-        return False
+        # Exact match or common variations (/P, /M, /QRP, etc.) on either side
+        callsign = callsign.upper()
+        return callsign in self._my_variants or callsign.partition('/')[0] in self._my_variants
     
     def find_matches(self, time_window_minutes: int = 10, freq_tolerance_hz: int = 1000):
         """Find matches between SOTA and RBN spots - FIXED VERSION
@@ -530,105 +1348,51 @@ class DatabaseManager:
         Uses INSERT IGNORE to prevent duplicate matches while preserving location data.
         """
         conn = self.get_connection()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        cursor = conn.cursor()
+        time_window_seconds = time_window_minutes * 60
         
         try:
-            # Find matches within time and frequency windows
-            # Exclude matches that already exist to avoid reprocessing
-            cursor.execute("""
-                SELECT 
-                    s.id as sota_id, 
-                    r.id as rbn_id,
-                    s.callsign,
-                    s.frequency as sota_freq,
-                    r.frequency as rbn_freq,
-                    s.timestamp as sota_timestamp,
-                    r.timestamp as rbn_timestamp,
-                    s.summit,
-                    s.spotter as sota_spotter,
-                    r.spotter as rbn_spotter,
-                    r.snr
-                FROM sota_spots s
-                JOIN rbn_spots r ON (
-                    ABS(s.frequency - r.frequency) <= %s AND
-                    ABS(TIMESTAMPDIFF(SECOND, s.timestamp, r.timestamp)) <= %s AND
-                    s.callsign = r.callsign
-                )
-                LEFT JOIN matches m ON (m.sota_id = s.id AND m.rbn_id = r.id)
-                WHERE s.timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
-                AND r.timestamp >= DATE_SUB(NOW(), INTERVAL 24 HOUR)
-                AND m.id IS NULL
-                ORDER BY s.timestamp DESC, r.timestamp DESC
-            """, (freq_tolerance_hz / 1000000, time_window_minutes * 60))
-            
-            matches = cursor.fetchall()
-            logger.info(f"Found {len(matches)} new potential matches (excluding existing)")
+            # Matching runs entirely in MySQL, so no candidate rows cross the wire
+            conn.begin()
+            cursor.execute(INSERT_NEW_MATCHES_SQL,
+                           (time_window_seconds, time_window_seconds, freq_tolerance_hz / 1000000))
+            matches_created = cursor.rowcount
             
-            matches_created = 0
-            for match in matches:
-                # Access dictionary keys instead of list indices
-                sota_id = match['sota_id']
-                rbn_id = match['rbn_id']
-                callsign = match['callsign']
-                sota_freq = match['sota_freq']
-                rbn_freq = match['rbn_freq']
-                sota_timestamp = match['sota_timestamp']
-                rbn_timestamp = match['rbn_timestamp']
-                summit = match['summit']
-                sota_spotter = match['sota_spotter']
-                rbn_spotter = match['rbn_spotter']
-                snr = match['snr']
-                
-                try:
-                    # Parse MySQL DATETIME format (2025-09-04 18:48:00)
-                    sota_dt = datetime.strptime(str(sota_timestamp), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                    rbn_dt = datetime.strptime(str(rbn_timestamp), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                    
-                    time_diff = int((rbn_dt - sota_dt).total_seconds())
-                    freq_diff = int((rbn_freq - sota_freq) * 1000000)  # Convert to Hz
-                    
-                    # Insert using actual column names from the database schema
-                    cursor.execute("""
-                        INSERT IGNORE INTO matches 
-                        (sota_id, rbn_id, sota_spotter, rbn_spotter, time_diff_seconds, freq_diff_hz, match_timestamp)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (sota_id, rbn_id, sota_spotter, rbn_spotter, time_diff, freq_diff, datetime.now(timezone.utc)))
-                    
-                    matches_created += 1
-                    
-                except Exception as e:
-                    logger.error(f"Error processing match {sota_id}-{rbn_id}: {e}")
-                    logger.error(f"  SOTA timestamp: {sota_timestamp} (type: {type(sota_timestamp)})")
-                    logger.error(f"  RBN timestamp: {rbn_timestamp} (type: {type(rbn_timestamp)})")
-                    continue
+            # Protect every matched RBN spot from cleanup in one statement
+            if matches_created:
+                cursor.execute(MARK_ALL_RBN_MATCHED_SQL)
             
             conn.commit()
+            if matches_created:
+                self.data_changed.set()
             logger.info(f"Created {matches_created} new matches")
             return matches_created
             
         except Exception as e:
-            logger.error(f"Error in find_matches: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error in find_matches: {e}", exc_info=True)
             conn.rollback()
             return 0
-        finally:
-            conn.close()
     
     
-    def get_my_callsign_spots(self, minutes: int = 5):
-        """Get recent spots of my callsign"""
+    def match_window_key(self, minutes: int) -> Tuple:
+        """Cheap fingerprint of the matches in the last minutes and of their location enrichment"""
+        cursor = self.get_connection().cursor()
+        cursor.execute(MATCH_WINDOW_KEY_SQL, (minutes,))
+        row = cursor.fetchone()
+        return (minutes, row['n'], row['first_id'], row['last_id'], row['n_enhanced'], row['last_enhanced'])
+    
+    def get_my_callsign_spots(self, minutes: int = 5, limit: Optional[int] = None):
+        """Get recent spots of my callsign, newest first and at most limit of them"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute("""
-                SELECT callsign, frequency, snr, timestamp, spotter, mode
-                FROM rbn_spots 
-                WHERE callsign = %s 
-                AND timestamp >= DATE_SUB(NOW(), INTERVAL %s MINUTE)
-                ORDER BY timestamp DESC
-            """, (self.my_callsign, minutes))
+            sql = SELECT_MY_CALLSIGN_SPOTS_SQL
+            params = [self.my_callsign, minutes]
+            if limit is not None:
+                sql += " LIMIT %s"
+                params.append(limit)
+            cursor.execute(sql, params)
             
             spots = cursor.fetchall()
             return spots
@@ -636,8 +1400,19 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Error getting my callsign spots: {e}")
             return []
-        finally:
-            conn.close()
+    
+    def count_my_callsign_spots(self, minutes: int = 5) -> int:
+        """Count recent spots of my callsign using idx_rbn_call_ts alone"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(COUNT_MY_CALLSIGN_SPOTS_SQL, (self.my_callsign, minutes))
+            return cursor.fetchone()['n']
+            
+        except Exception as e:
+            logger.error(f"Error counting my callsign spots: {e}")
+            return 0
     
     
     def cleanup_old_rbn_spots(self, hours: int = 24):
@@ -666,8 +1441,6 @@ class DatabaseManager:
             logger.error(f"Error cleaning up old RBN spots: {e}")
             conn.rollback()
             return 0
-        finally:
-            conn.close()
     
     def find_matches_for_new_spot(self, spot_id: int, callsign: str, is_sota: bool = False) -> int:
         """Find matches for a newly inserted spot"""
@@ -688,7 +1461,9 @@ class DatabaseManager:
                         r.timestamp as rbn_timestamp,
                         s.summit,
                         s.spotter as sota_spotter,
-                        r.spotter as rbn_spotter
+                        r.spotter as rbn_spotter,
+                        TIMESTAMPDIFF(SECOND, s.timestamp, r.timestamp) as time_diff,
+                        ROUND((r.frequency - s.frequency) * 1000000) as freq_diff
                     FROM sota_spots s
                     JOIN rbn_spots r ON s.callsign = r.callsign
                     WHERE 
@@ -710,7 +1485,9 @@ class DatabaseManager:
                         r.timestamp as rbn_timestamp,
                         s.summit,
                         s.spotter as sota_spotter,
-                        r.spotter as rbn_spotter
+                        r.spotter as rbn_spotter,
+                        TIMESTAMPDIFF(SECOND, s.timestamp, r.timestamp) as time_diff,
+                        ROUND((r.frequency - s.frequency) * 1000000) as freq_diff
                     FROM sota_spots s
                     JOIN rbn_spots r ON s.callsign = r.callsign
                     WHERE 
@@ -722,6 +1499,7 @@ class DatabaseManager:
             
             matches = cursor.fetchall()
             matched_rbn_ids = []
+            conn.begin()
             
             # Insert matches and collect matched RBN IDs
             for match in matches:
@@ -737,21 +1515,8 @@ class DatabaseManager:
                 sota_spotter = match['sota_spotter']
                 rbn_spotter = match['rbn_spotter']
                 
-                # Calculate differences
-                # Parse MySQL DATETIME format (2025-09-04 18:48:00)
-                try:
-                    sota_dt = datetime.strptime(str(sota_timestamp), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                except (ValueError, TypeError):
-                    # Fallback to original method for other formats
-                    sota_dt = datetime.fromisoformat(str(sota_timestamp).replace('Z', '+00:00'))
-                # Parse MySQL DATETIME format (2025-09-04 18:48:00)
-                try:
-                    rbn_dt = datetime.strptime(str(rbn_timestamp), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
-                except (ValueError, TypeError):
-                    # Fallback to original method for other formats
-                    rbn_dt = datetime.fromisoformat(str(rbn_timestamp).replace('Z', '+00:00'))
-                time_diff = int((rbn_dt - sota_dt).total_seconds())
-                freq_diff = int((rbn_freq - sota_freq) * 1000000)  # Convert to Hz
+                time_diff = match['time_diff']
+                freq_diff = int(match['freq_diff'])  # Hz
                 
                 cursor.execute("""
                     INSERT IGNORE INTO matches 
@@ -768,25 +1533,22 @@ class DatabaseManager:
             
             # Mark matched RBN spots as SOTA-matched and permanent
             if matched_rbn_ids:
-                placeholders = ','.join(['%s' for _ in matched_rbn_ids])
-                cursor.execute(f"""
-                    UPDATE rbn_spots 
-                    SET is_sota_matched = TRUE, keep_permanent = TRUE
-                    WHERE id IN ({placeholders})
-                """, matched_rbn_ids)
+                if is_sota:
+                    cursor.execute(MARK_RBN_MATCHED_FOR_SOTA_SQL, (spot_id,))
+                else:
+                    cursor.execute(MARK_RBN_MATCHED_SQL, (spot_id,))
                 
                 logger.info(f"Marked {len(matched_rbn_ids)} RBN spots as SOTA-matched")
             
             conn.commit()
+            if matches:
+                self.data_changed.set()
             return len(matches)
             
         except Exception as e:
-            logger.error(f"Error finding matches for new spot: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error finding matches for new spot: {e}", exc_info=True)
             conn.rollback()
             return 0
-        finally:
-            conn.close()
     
     def _get_cached_locations(self, conn, callsigns, summits):
         """Get cached locations from database"""
@@ -823,26 +1585,15 @@ class DatabaseManager:
         return cached
     
     def _batch_fetch_callsign_locations(self, callsigns):
-        """Batch fetch callsign locations from QRZ.com"""
+        """Batch fetch callsign locations from QRZ.com, overlapping the lookups"""
         locations = {}
-        batch_size = 10  # QRZ.com rate limiting
+        callsigns = list(dict.fromkeys(callsigns))
+        logger.info(f"Fetching QRZ data for {len(callsigns)} callsigns with {self.qrz_workers} workers")
         
-        for i in range(0, len(callsigns), batch_size):
-            batch = callsigns[i:i + batch_size]
-            logger.info(f"Fetching QRZ data for batch {i//batch_size + 1}: {batch}")
-            
-            for callsign in batch:
-                try:
-                    location = self.get_rbn_location(callsign)
-                    if location:
-                        locations[callsign] = location
-                    time.sleep(0.1)  # Rate limiting
-                except Exception as e:
-                    logger.warning(f"Failed to fetch location for {callsign}: {e}")
-            
-            # Longer delay between batches
-            if i + batch_size < len(callsigns):
-                time.sleep(1)
+        # get_rbn_location handles its own errors and returns None on failure
+        for callsign, location in zip(callsigns, self._qrz_executor.map(self.get_rbn_location, callsigns)):
+            if location:
+                locations[callsign] = location
         
         return locations
     
@@ -1009,6 +1760,7 @@ class DatabaseManager:
                 # Batch update matches
                 if update_data:
                     logger.info(f"Batch updating {len(update_data)} matches with location data")
+                    conn.begin()
                     cursor.executemany("""
                         UPDATE matches 
                         SET 
@@ -1025,8 +1777,12 @@ class DatabaseManager:
                             location_enhancement_timestamp = NOW()
                         WHERE id = %s
                     """, update_data)
+                    updated = cursor.rowcount
                     
                     conn.commit()
+                    # Resolved locations can bring paths into the stats and map
+                    if updated:
+                        self.data_changed.set()
                     total_enhanced += len(update_data)
                     logger.info(f"Successfully enhanced {len(update_data)} matches")
                 
@@ -1049,24 +1805,45 @@ class DatabaseManager:
             return total_enhanced
             
         except Exception as e:
-            logger.error(f"Error enhancing matches with location data: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error enhancing matches with location data: {e}", exc_info=True)
             conn.rollback()
             return 0
-        finally:
-            conn.close()
+    
+    def _cached_location(self, cache: Dict[str, Tuple[float, Location]], key: str, loader) -> Optional[Location]:
+        """Return a location from an in-memory cache, loading and storing it on a miss"""
+        with self._location_cache_lock:
+            cached = cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.location_cache_ttl:
+            return cached[1]
+        
+        # Load outside the lock so a slow lookup doesn't stall the other workers
+        location = loader(key)
+        if location is not None:
+            with self._location_cache_lock:
+                if key not in cache and len(cache) >= self.location_cache_size:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    cache.pop(next(iter(cache)), None)
+                cache[key] = (time.monotonic(), location)
+        return location
     
     def get_sota_location(self, summit_ref: str) -> Optional[Location]:
+        """Get SOTA summit location, cached in memory"""
+        return self._cached_location(self._summit_locations, summit_ref, self._load_sota_location)
+    
+    def get_rbn_location(self, spotter: str) -> Optional[Location]:
+        """Get RBN spotter location, cached in memory"""
+        # Clean spotter callsign (remove -# suffix)
+        clean_spotter = spotter.partition('-')[0].upper()
+        return self._cached_location(self._spotter_locations, clean_spotter, self._load_rbn_location)
+    
+    def _load_sota_location(self, summit_ref: str) -> Optional[Location]:
         """Get SOTA summit location from database or fetch from API"""
         conn = self.get_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
         try:
             # Try to get from database first
-            cursor.execute("""
-                SELECT latitude, longitude, name FROM sota_locations 
-                WHERE summit_ref = %s
-            """, (summit_ref,))
+            cursor.execute(SELECT_SOTA_LOCATION_SQL, (summit_ref,))
             
             result = cursor.fetchone()
             if result:
@@ -1074,10 +1851,9 @@ class DatabaseManager:
             
             # Fetch from SOTA API
             try:
-                import requests
                 # SOTA API endpoint
                 url = f"https://api2.sota.org.uk/api/summits/{summit_ref}"
-                response = requests.get(url, timeout=10)
+                response = self.http_session.get(url, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1102,32 +1878,21 @@ class DatabaseManager:
                         
                         return Location(lat, lon, name)
             except Exception as e:
-                logger.warning(f"Failed to fetch SOTA location for {summit_ref}: {e}")
-                import traceback
-                logger.warning(f"Traceback: {traceback.format_exc()}")
+                logger.warning(f"Failed to fetch SOTA location for {summit_ref}: {e}", exc_info=True)
             
         except Exception as e:
             logger.error(f"Error getting SOTA location for {summit_ref}: {e}")
-        finally:
-            if conn.open:
-                conn.close()
         
         return None
     
-    def get_rbn_location(self, spotter: str) -> Optional[Location]:
+    def _load_rbn_location(self, clean_spotter: str) -> Optional[Location]:
         """Get RBN spotter location from database, QRZ, or estimate from callsign"""
         conn = self.get_connection()
         cursor = conn.cursor(pymysql.cursors.DictCursor)
         
         try:
-            # Clean spotter callsign (remove -# suffix)
-            clean_spotter = spotter.split('-')[0].upper()
-            
             # Try to get from database first (check if recent)
-            cursor.execute("""
-                SELECT latitude, longitude, name, source, last_updated FROM rbn_locations 
-                WHERE spotter = %s
-            """, (clean_spotter,))
+            cursor.execute(SELECT_RBN_LOCATION_SQL, (clean_spotter,))
             
             result = cursor.fetchone()
             if result:
@@ -1206,120 +1971,79 @@ class DatabaseManager:
             return location
             
         except Exception as e:
-            logger.error(f"Error getting RBN location for {spotter}: {e}")
+            logger.error(f"Error getting RBN location for {clean_spotter}: {e}")
             return None
-        finally:
-            if conn.open:
-                conn.close()
     
     def _estimate_location_from_callsign(self, callsign: str) -> Optional[Location]:
         """Rough location estimation based on callsign prefix"""
-        # This is a simplified mapping - in practice you'd want a more complete database
-        prefix_locations = {
-            'W1': Location(42.3601, -71.0589, 'New England'),
-            'W2': Location(40.7128, -74.0060, 'New York/New Jersey'),
-            'W3': Location(39.9526, -75.1652, 'Pennsylvania/Delaware'),
-            'W4': Location(33.7490, -84.3880, 'Southeast US'),
-            'W5': Location(32.7767, -96.7970, 'South Central US'),
-            'W6': Location(34.0522, -118.2437, 'California'),
-            'W7': Location(47.6062, -122.3321, 'Pacific Northwest'),
-            'W8': Location(41.4993, -81.6944, 'Great Lakes'),
-            'W9': Location(41.8781, -87.6298, 'Midwest'),
-            'W0': Location(39.7391, -104.9847, 'Mountain/Plains'),
-            'VE1': Location(44.6488, -63.5752, 'Nova Scotia'),
-            'VE2': Location(45.5017, -73.5673, 'Quebec'),
-            'VE3': Location(43.6532, -79.3832, 'Ontario'),
-            'VE4': Location(49.8951, -97.1384, 'Manitoba'),
-            'VE5': Location(52.1332, -106.6700, 'Saskatchewan'),
-            'VE6': Location(51.0447, -114.0719, 'Alberta'),
-            'VE7': Location(49.2827, -123.1207, 'British Columbia'),
-            'G': Location(51.5074, -0.1278, 'England'),
-            'GM': Location(55.9533, -3.1883, 'Scotland'),
-            'GW': Location(51.4816, -3.1791, 'Wales'),
-            'EI': Location(53.3498, -6.2603, 'Ireland'),
-            'ON': Location(50.8503, 4.3517, 'Belgium'),
-            'PA': Location(52.3676, 4.9041, 'Netherlands'),
-            'DL': Location(52.5200, 13.4050, 'Germany'),
-            'F': Location(48.8566, 2.3522, 'France'),
-            'JA': Location(35.6762, 139.6503, 'Japan'),
-            'HL': Location(37.5665, 126.9780, 'South Korea'),
-            'VK': Location(-33.8688, 151.2093, 'Australia'),
-        }
-        
-        # Find matching prefix
-        for prefix, location in prefix_locations.items():
-            if callsign.startswith(prefix):
-                return location
+        i = _longest_prefix_index(callsign)
+        if i >= 0:
+            return Location(float(_PREFIX_LATS[i]), float(_PREFIX_LONS[i]), _PREFIX_NAMES[i])
         
         # Try single letter prefixes for US
-        if len(callsign) >= 2 and callsign[0] in 'NKWA':
-            region = callsign[1]
-            if region in '123456789':
-                us_regions = {
-                    '1': Location(42.3601, -71.0589, 'New England'),
-                    '2': Location(40.7128, -74.0060, 'New York/New Jersey'),
-                    '3': Location(39.9526, -75.1652, 'Pennsylvania/Delaware'),
-                    '4': Location(33.7490, -84.3880, 'Southeast US'),
-                    '5': Location(32.7767, -96.7970, 'South Central US'),
-                    '6': Location(34.0522, -118.2437, 'California'),
-                    '7': Location(47.6062, -122.3321, 'Pacific Northwest'),
-                    '8': Location(41.4993, -81.6944, 'Great Lakes'),
-                    '9': Location(41.8781, -87.6298, 'Midwest'),
-                    '0': Location(39.7391, -104.9847, 'Mountain/Plains'),
-                }
-                return us_regions.get(region)
+        if len(callsign) >= 2 and callsign[0] in 'NKWA' and '0' <= callsign[1] <= '9':
+            lat, lon, name = _US_REGIONS[int(callsign[1])]
+            return Location(lat, lon, name)
         
         return None
     
-    def get_propagation_paths(self, minutes: int = 1440) -> List[PropagationPath]:
-        """Get propagation paths from recent matches"""
+    def get_window_matches(self, minutes: int = 1440) -> List[Dict]:
+        """Get the matches of the last minutes with their spot details and cached locations"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT 
-                s.callsign,
-                s.summit,
-                s.frequency as sota_freq,
-                r.frequency as rbn_freq,
-                r.spotter,
-                r.snr,
-                m.match_timestamp
-            FROM matches m
-            JOIN sota_spots s ON m.sota_id = s.id
-            JOIN rbn_spots r ON m.rbn_id = r.id
-            WHERE m.match_timestamp > DATE_SUB(NOW(), INTERVAL %s MINUTE)
-            ORDER BY m.match_timestamp DESC
-        """, (minutes,))
-        
-        matches = cursor.fetchall()
-        conn.close()
-        
-        paths = []
+        cursor.execute(SELECT_WINDOW_MATCHES_SQL, (minutes,))
+        
+        return cursor.fetchall()
+    
+    def get_propagation_paths(self, minutes: int = 1440, matches: Optional[List[Dict]] = None) -> PropagationPaths:
+        """Get propagation paths from recent matches, or from rows already fetched by get_window_matches"""
+        if matches is None:
+            matches = self.get_window_matches(minutes)
+        
+        # Locations come back with the match rows; only rows whose summit or
+        # spotter isn't cached yet go through the API/QRZ lookups
+        located = []
         for match in matches:
-            callsign, summit, sota_freq, rbn_freq, spotter, snr, timestamp = match
-            
-            # Get locations
-            sota_loc = self.get_sota_location(summit)
-            rbn_loc = self.get_rbn_location(spotter)
-            
+            if match['sota_lat'] is not None:
+                sota_loc = Location(match['sota_lat'], match['sota_lon'], match['sota_name'] or match['summit'])
+            else:
+                sota_loc = self.get_sota_location(match['summit'])
+            if match['rbn_lat'] is not None:
+                rbn_loc = Location(match['rbn_lat'], match['rbn_lon'], match['rbn_name'] or match['spotter'])
+            else:
+                rbn_loc = self.get_rbn_location(match['spotter'])
             if sota_loc and rbn_loc:
-                distance = sota_loc.distance_to(rbn_loc)
-                
-                path = PropagationPath(
-                    sota_summit=summit,
-                    sota_location=sota_loc,
-                    rbn_spotter=spotter,
-                    rbn_location=rbn_loc,
-                    frequency=rbn_freq,
-                    distance_km=distance,
-                    timestamp=datetime.fromisoformat(timestamp),
-                    snr=snr,
-                    callsign=callsign
-                )
-                paths.append(path)
-        
-        return paths
+                located.append((match, sota_loc, rbn_loc))
+        
+        if not located:
+            return PropagationPaths.empty()
+        
+        # One pass over the paths into a (n, 7) array, then contiguous columns.
+        # Timestamps come back as epoch seconds so they convert as a column too
+        columns = np.array(
+            [(sota_loc.latitude, sota_loc.longitude, rbn_loc.latitude, rbn_loc.longitude,
+              match['rbn_freq'], match['snr'], match['match_epoch'])
+             for match, sota_loc, rbn_loc in located],
+            dtype=np.float64
+        ).T.copy()
+        sota_lat, sota_lon, rbn_lat, rbn_lon, frequency, snr, epoch = columns
+        
+        return PropagationPaths(
+            callsign=[match['callsign'] for match, _, _ in located],
+            sota_summit=[match['summit'] for match, _, _ in located],
+            sota_name=[sota_loc.name for _, sota_loc, _ in located],
+            rbn_spotter=[match['spotter'] for match, _, _ in located],
+            rbn_name=[rbn_loc.name for _, _, rbn_loc in located],
+            sota_lat=sota_lat,
+            sota_lon=sota_lon,
+            rbn_lat=rbn_lat,
+            rbn_lon=rbn_lon,
+            frequency=frequency,
+            snr=snr.astype(np.int64),
+            distance_km=haversine_bulk(sota_lat, sota_lon, rbn_lat, rbn_lon),
+            timestamp=epoch.astype(np.int64).astype('datetime64[s]')
+        )
     
     def generate_propagation_map(self, minutes: int = 1440, output_file: str = "propagation_map.html"):
         """Generate an interactive HTML map showing propagation paths"""
@@ -1329,334 +2053,103 @@ class DatabaseManager:
             logger.warning("No propagation paths found for mapping")
             return None
         
-        # Create HTML map
-        html_content = self._create_map_html(paths)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # Stream the path data between the HTML head and tail, then swap the
+        # finished file in so the web server never serves a partial map
+        html_head, html_tail = self._create_map_html(paths)
+        tmp_file = f"{output_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(html_head)
+            f.write('[')
+            for i, path_data in enumerate(self._map_path_data(paths)):
+                if i:
+                    f.write(',')
+                f.write(_json_dumps(path_data))
+            f.write(']')
+            f.write(html_tail)
+        os.replace(tmp_file, output_file)
         
         logger.info(f"Propagation map saved to {output_file} with {len(paths)} paths")
         return output_file
     
-    def _create_map_html(self, paths: List[PropagationPath]) -> str:
-        """Create HTML content for the propagation map"""
-        # Calculate map center
-        if not paths:
-            center_lat, center_lon = 40.0, -100.0  # Default to center of US
-        else:
-            all_lats = [p.sota_location.latitude for p in paths] + [p.rbn_location.latitude for p in paths]
-            all_lons = [p.sota_location.longitude for p in paths] + [p.rbn_location.longitude for p in paths]
-            center_lat = sum(all_lats) / len(all_lats)
-            center_lon = sum(all_lons) / len(all_lons)
-        
-        # Generate path data for JavaScript
-        paths_js = []
-        for i, path in enumerate(paths):
-            path_data = {
+    def _map_path_data(self, paths: PropagationPaths):
+        """Yield the JavaScript data for each path, including its great-circle line split at ±180"""
+        # All polylines in one vectorized pass; 4 decimals is ~10 m, plenty for the map
+        lines = np.round(great_circle_points(paths.sota_lat, paths.sota_lon, paths.rbn_lat, paths.rbn_lon), 4)
+        
+        # Line color by band and weight by SNR, looked up once per path here
+        colors = MAP_BAND_COLORS[np.digitize(paths.frequency, MAP_BAND_EDGES_KHZ)].tolist()
+        weights = (np.digitize(paths.snr, MAP_SNR_WEIGHT_EDGES) + 1).tolist()
+        
+        # Plain Python values for the JSON encoder
+        sota_lat, sota_lon = paths.sota_lat.tolist(), paths.sota_lon.tolist()
+        rbn_lat, rbn_lon = paths.rbn_lat.tolist(), paths.rbn_lon.tolist()
+        frequency, snr = paths.frequency.tolist(), paths.snr.tolist()
+        distance = np.round(paths.distance_km, 1).tolist()
+        timestamps = np.datetime_as_string(paths.timestamp, unit='s').tolist()
+        
+        for i in range(len(paths)):
+            yield {
                 'id': i,
-                'callsign': path.callsign,
-                'summit': path.sota_summit,
-                'summit_name': path.sota_location.name,
-                'summit_lat': path.sota_location.latitude,
-                'summit_lon': path.sota_location.longitude,
-                'spotter': path.rbn_spotter,
-                'spotter_name': path.rbn_location.name,
-                'spotter_lat': path.rbn_location.latitude,
-                'spotter_lon': path.rbn_location.longitude,
-                'frequency': path.frequency,
-                'distance': round(path.distance_km, 1),
-                'snr': path.snr,
-                'timestamp': path.timestamp.strftime('%Y-%m-%d %H:%M:%S UTC')
+                'callsign': paths.callsign[i],
+                'summit': paths.sota_summit[i],
+                'summit_name': paths.sota_name[i],
+                'summit_lat': sota_lat[i],
+                'summit_lon': sota_lon[i],
+                'spotter': paths.rbn_spotter[i],
+                'spotter_name': paths.rbn_name[i],
+                'spotter_lat': rbn_lat[i],
+                'spotter_lon': rbn_lon[i],
+                'frequency': frequency[i],
+                'distance': distance[i],
+                'snr': snr[i],
+                'timestamp': f"{timestamps[i][:10]} {timestamps[i][11:]} UTC",
+                'coords': split_antimeridian(lines[i]),
+                'color': colors[i],
+                'weight': weights[i]
             }
-            paths_js.append(path_data)
-        
-        html_template = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>SOTA-RBN Propagation Map</title>
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta http-equiv="refresh" content="60">
-    <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css" />
-    <style>
-        body {{ margin: 0; padding: 0; font-family: Arial, sans-serif; }}
-        #map {{ height: 100vh; }}
-        .info-panel {{
-            position: absolute;
-            top: 10px;
-            right: 10px;
-            background: white;
-            padding: 15px;
-            border-radius: 5px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            z-index: 1000;
-            max-width: 300px;
-        }}
-        .path-info {{
-            margin-bottom: 10px;
-            padding: 8px;
-            border-left: 4px solid #3388ff;
-            background: #f8f9fa;
-        }}
-        .legend {{
-            position: absolute;
-            bottom: 30px;
-            right: 10px;
-            background: white;
-            padding: 10px;
-            border-radius: 5px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            z-index: 1000;
-        }}
-        .legend-item {{
-            display: flex;
-            align-items: center;
-            margin: 5px 0;
-        }}
-        .legend-color {{
-            width: 20px;
-            height: 3px;
-            margin-right: 10px;
-        }}
-        .legend-circle {{
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            margin-right: 10px;
-            border: 2px solid;
-        }}
-        #timestamp-info {{
-            margin: 8px 0;
-            padding: 5px;
-            background: #f8f9fa;
-            border-radius: 3px;
-            font-size: 0.85em;
-            color: #666;
-        }}
-    </style>
-</head>
-<body>
-    <div id="map"></div>
     
-    <div class="info-panel">
-        <h3>SOTA-RBN Propagation Paths</h3>
-        <div id="stats">
-            <strong>Paths: {len(paths)}</strong><br>
+    def _create_map_html(self, paths: PropagationPaths) -> Tuple[str, str]:
+        """Create the HTML before and after the path data for the propagation map"""
+        # Calculate map center and bounds
+        if not paths:
+            center_lat, center_lon = 40.0, -100.0  # Default to center of US
+            bounds = 'null'
+        else:
+            lats = np.concatenate((paths.sota_lat, paths.rbn_lat))
+            lons = np.concatenate((paths.sota_lon, paths.rbn_lon))
+            center_lat = float(lats.mean())
+            center_lon = float(lons.mean())
+            bounds = (f"[[{float(lats.min())}, {float(lons.min())}], "
+                      f"[{float(lats.max())}, {float(lons.max())}]]")
+        
+        generated = datetime.now(timezone.utc)
+        html_head = (
+            MAP_HTML_HEAD
+            + f"""            <strong>Paths: {len(paths)}</strong><br>
             <div id="timestamp-info">
-                <small>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}</small><br>
+                <small>Generated: {generated:%Y-%m-%d %H:%M:%S} UTC</small><br>
                 <small id="age-info">Age: <span id="age-display">calculating...</span></small>
             </div>
-            <span id="selected-info">Click a path for details</span>
-        </div>
-    </div>
-    
-    <div class="legend">
-        <h4>Legend</h4>
-        <div class="legend-item">
-            <div class="legend-circle" style="background: #ff4444; border-color: #ff0000;"></div>
-            <span>🏔️ SOTA Summit</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-circle" style="background: #4444ff; border-color: #0000ff;"></div>
-            <span>📡 RBN Spotter</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-color" style="background: #ff2222;"></div>
-            <span>📶 40m & below</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-color" style="background: #ff8844;"></div>
-            <span>📶 20m</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-color" style="background: #ffff44;"></div>
-            <span>📶 15m</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-color" style="background: #44ff44;"></div>
-            <span>📶 12/10m</span>
-        </div>
-        <div class="legend-item">
-            <div class="legend-color" style="background: #4444ff;"></div>
-            <span>📶 6m & above</span>
-        </div>
-    </div>
-
-    <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
-    <script>
-        // Initialize map
-        var map = L.map('map').setView([{center_lat}, {center_lon}], 4);
-        
-        // Add tile layer
-        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
-            attribution: '© OpenStreetMap contributors'
-        }}).addTo(map);
-        
-        // Path data
-        var paths = {json.dumps(paths_js)};
-        
-        // Page generation time and age calculation
-        var pageGeneratedTime = new Date('{datetime.now().strftime('%Y-%m-%dT%H:%M:%S')}Z');
-        
-        function updateAge() {{
-            var now = new Date();
-            var ageMs = now - pageGeneratedTime;
-            var ageMinutes = Math.floor(ageMs / (1000 * 60));
-            var ageHours = Math.floor(ageMinutes / 60);
-            var ageDays = Math.floor(ageHours / 24);
-            
-            var ageText;
-            if (ageDays > 0) {{
-                ageText = ageDays + ' day' + (ageDays > 1 ? 's' : '') + ' ago';
-            }} else if (ageHours > 0) {{
-                ageText = ageHours + ' hour' + (ageHours > 1 ? 's' : '') + ' ago';
-            }} else {{
-                ageText = ageMinutes + ' minute' + (ageMinutes > 1 ? 's' : '') + ' ago';
-            }}
-            
-            document.getElementById('age-display').textContent = ageText;
-        }}
+"""
+            + MAP_HTML_LEGEND
+            + f"""    <script>
+        // Bounding box of all summits and spotters, computed when the map was generated
+        var bounds = {bounds};
+        var center = [{center_lat}, {center_lon}];
         
-        // Update age immediately and then every minute
-        updateAge();
-        setInterval(updateAge, 60000);
+        // Page generation time, for the age display
+        var pageGeneratedTime = new Date('{generated:%Y-%m-%dT%H:%M:%S}Z');
         
-        // Track layers for cleanup
-        var pathLayers = [];
-        
-        // Function to get line color based on frequency
-        function getFrequencyColor(freq) {{
-            if (freq < 7500) return '#ff2222';      // 40m and below - red
-            if (freq < 14500) return '#ff8844';     // 20m - orange  
-            if (freq < 21500) return '#ffff44';     // 15m - yellow
-            if (freq < 29000) return '#44ff44';     // 12/10m - green
-            return '#4444ff';                      // 6m and above - blue
-        }}
-        
-        // Function to get line weight based on SNR
-        function getLineWeight(snr) {{
-            if (snr < 5) return 1;
-            if (snr < 10) return 2;
-            if (snr < 15) return 3;
-            if (snr < 20) return 4;
-            if (snr < 25) return 5;
-            if (snr < 30) return 6;
-            if (snr < 35) return 7;
-            return 8;
-        }}
-        
-        // Function to calculate great circle points between two coordinates
-        function getGreatCirclePoints(lat1, lon1, lat2, lon2, numPoints = 50) {{
-            var points = [];
-            var lat1Rad = lat1 * Math.PI / 180;
-            var lon1Rad = lon1 * Math.PI / 180;
-            var lat2Rad = lat2 * Math.PI / 180;
-            var lon2Rad = lon2 * Math.PI / 180;
-            
-            var d = Math.acos(Math.sin(lat1Rad) * Math.sin(lat2Rad) + 
-                             Math.cos(lat1Rad) * Math.cos(lat2Rad) * Math.cos(lon2Rad - lon1Rad));
-            
-            for (var i = 0; i <= numPoints; i++) {{
-                var f = i / numPoints;
-                var a = Math.sin((1 - f) * d) / Math.sin(d);
-                var b = Math.sin(f * d) / Math.sin(d);
-                
-                var x = a * Math.cos(lat1Rad) * Math.cos(lon1Rad) + b * Math.cos(lat2Rad) * Math.cos(lon2Rad);
-                var y = a * Math.cos(lat1Rad) * Math.sin(lon1Rad) + b * Math.cos(lat2Rad) * Math.sin(lon2Rad);
-                var z = a * Math.sin(lat1Rad) + b * Math.sin(lat2Rad);
-                
-                var lat = Math.atan2(z, Math.sqrt(x * x + y * y)) * 180 / Math.PI;
-                var lon = Math.atan2(y, x) * 180 / Math.PI;
-                
-                points.push([lat, lon]);
-            }}
-            
-            return points;
-        }}
-        
-        // Add paths to map
-        paths.forEach(function(path) {{
-            // SOTA summit marker
-            var summitMarker = L.circleMarker([path.summit_lat, path.summit_lon], {{
-                radius: 4,
-                color: '#ff0000',
-                fillColor: '#ff4444',
-                fillOpacity: 0.8
-            }}).addTo(map);
-            
-            summitMarker.bindPopup(`
-                <strong>🏔️ SOTA Summit</strong><br>
-                <strong>${{path.summit}}</strong><br>
-                ${{path.summit_name}}<br>
-                <em>Activated by ${{path.callsign}}</em><br>
-                <br>
-                <a href="https://sotl.as/summits/${{path.summit}}" target="_blank">📋 View on SOTL.AS</a><br>
-                <a href="https://sotl.as/activators/${{path.callsign}}" target="_blank">SOTL.as Activator Profile</a>
-            `);
-            
-            // RBN spotter marker
-            var spotterMarker = L.circleMarker([path.spotter_lat, path.spotter_lon], {{
-                radius: 3,
-                color: '#0000ff',
-                fillColor: '#4444ff',
-                fillOpacity: 0.8
-            }}).addTo(map);
-            
-            spotterMarker.bindPopup(`
-                <strong>📡 RBN Spotter</strong><br>
-                <strong>${{path.spotter}}</strong><br>
-                ${{path.spotter_name}}<br>
-                SNR: ${{path.snr}} dB
-            `);
-            
-            // Propagation path line (great circle)
-            var greatCirclePoints = getGreatCirclePoints(
-                path.summit_lat, path.summit_lon,
-                path.spotter_lat, path.spotter_lon
-            );
-            var pathLine = L.polyline(greatCirclePoints, {{
-                color: getFrequencyColor(path.frequency),
-                weight: getLineWeight(path.snr),
-                opacity: 0.7
-            }}).addTo(map);
-            
-            // Add click handler for path info
-            pathLine.on('click', function() {{
-                document.getElementById('selected-info').innerHTML = `
-                    <div class="path-info">
-                        <strong>${{path.callsign}}</strong> on <strong>${{path.summit}}</strong><br>
-                        📡 Heard by: ${{path.spotter}}<br>
-                        📶 Frequency: ${{path.frequency.toFixed(1)}} kHz<br>
-                        📏 Distance: ${{path.distance}} km<br>
-                        📊 SNR: ${{path.snr}} dB<br>
-                        🕐 Time: ${{path.timestamp}}
-                    </div>
-                `;
-            }});
-            
-            pathLine.bindTooltip(`
-                ${{path.callsign}} → ${{path.spotter}}<br>
-                ${{path.frequency.toFixed(1)}} kHz, ${{path.distance}} km<br>
-                ${{path.snr}} dB
-            `);
-        }});
-        
-        // Fit map to show all points
-        if (paths.length > 0) {{
-            var group = new L.featureGroup();
-            paths.forEach(function(path) {{
-                group.addLayer(L.marker([path.summit_lat, path.summit_lon]));
-                group.addLayer(L.marker([path.spotter_lat, path.spotter_lon]));
-            }});
-            map.fitBounds(group.getBounds().pad(0.1));
-        }}
-    </script>
-</body>
-</html>
-        """
+"""
+            + MAP_HTML_SCRIPT
+        )
         
-        return html_template
+        return html_head, MAP_HTML_TAIL
+
+# DX cluster spot lines, e.g. "DX de G0ABC: 14.062 W4G/NG-001 CW 1200Z" (SOTA)
+# and "DX de W3LPL-#: 14025.0 K1ABC CW 22 dB 23 WPM CQ 1200Z" (RBN)
+SOTA_SPOT_RE = re.compile(r'DX de (\S+):\s+([\d.]+)\s+(\S+)\s+([\S\d/-]+)\s+([\d]+)Z')
+RBN_SPOT_RE = re.compile(r'DX de (\S+):\s+([\d.]+)\s+(\S+)\s+(\w+)\s+([-\d]+)\s+dB\s+[\d]+\s+WPM\s+(\S+)\s+(\d{4})Z')
 
 class ClusterConnection:
     def __init__(self, host: str, port: int, callsign: str, timeout: int, long_connection: bool = False):
@@ -1667,10 +2160,13 @@ class ClusterConnection:
         self.connected = False
         self.timeout = timeout
         self.long_connection = long_connection  # For connections that need to stay open for hours
+        self.recv_size = 8192
+        self._buffer = bytearray()  # Received bytes not yet returned by read_line
         
     def connect(self):
         """Connect to cluster"""
         try:
+            self._buffer.clear()
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             
             # For long connections (like SOTA), don't set a socket timeout
@@ -1689,8 +2185,7 @@ class ClusterConnection:
             logger.info(f"Connected to {self.host}:{self.port}")
             return True
         except Exception as e:
-            traceback.print_exc()
-            logger.error(f"Failed to connect to {self.host}:{self.port}: {e}")
+            logger.error(f"Failed to connect to {self.host}:{self.port}: {e}", exc_info=True)
             return False
     
     def disconnect(self):
@@ -1705,13 +2200,18 @@ class ClusterConnection:
             return None
             
         try:
-            buffer = b""
-            while b"\n" not in buffer:
-                data = self.socket.recv(1)
+            # Read in blocks and split lines out of the buffer; a partial line
+            # stays buffered across timeouts until the rest arrives
+            while True:
+                end = self._buffer.find(b"\n")
+                if end >= 0:
+                    line = self._buffer[:end + 1]
+                    del self._buffer[:end + 1]
+                    return line.decode('utf-8', errors='ignore').strip()
+                data = self.socket.recv(self.recv_size)
                 if not data:
                     return None
-                buffer += data
-            return buffer.decode('utf-8', errors='ignore').strip()
+                self._buffer += data
         except socket.timeout:
             # For long connections, timeout is expected and not an error
             if self.long_connection:
@@ -1720,32 +2220,48 @@ class ClusterConnection:
                 logger.error(f"Socket timeout reading from {self.host}:{self.port}")
                 return None
         except Exception as e:
-            logger.error(f"Error reading from cluster: {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error reading from cluster: {e}", exc_info=True)
             return None
 
+# (current UTC minute, {hhmm: datetime}); every spot within a minute shares
+# a handful of hhmm values, so each is converted once per minute
+_spot_time_cache: Tuple[int, Dict[str, datetime]] = (-1, {})
+
 def create_datetime(spot_time):
     """Convert spot time in hhmm format to datetime with date from now and time in last 24 hours"""
-    now = datetime.now(timezone.utc)
+    global _spot_time_cache
+    now_minute = int(time.time() // 60)
+    cache_minute, cache = _spot_time_cache
+    if cache_minute != now_minute:
+        cache = {}
+        _spot_time_cache = (now_minute, cache)
+    
+    spot_datetime = cache.get(spot_time)
+    if spot_datetime is not None:
+        return spot_datetime
     
     # Parse hhmm format (e.g., "1430" -> 14:30)
     try:
         hour = int(spot_time[:2])
         minute = int(spot_time[2:])
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError("hour or minute out of range")
         
-        # Create datetime for today with the parsed time
-        spot_datetime = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        # Epoch seconds for the parsed time today
+        now_epoch = now_minute * 60
+        spot_epoch = now_epoch - now_epoch % 86400 + hour * 3600 + minute * 60
         
         # If the spot time is in the future (e.g., it's 10 AM but spot says 2 PM),
         # it means the spot is from yesterday
-        if spot_datetime > now:
-            spot_datetime = spot_datetime - timedelta(days=1)
+        if spot_epoch > now_epoch:
+            spot_epoch -= 86400
         
+        spot_datetime = datetime.fromtimestamp(spot_epoch, tz=timezone.utc)
+        cache[spot_time] = spot_datetime
         return spot_datetime
     except (ValueError, IndexError) as e:
-        logger.error(f"Error parsing spot time '{spot_time}': {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        return now
+        logger.error(f"Error parsing spot time '{spot_time}': {e}", exc_info=True)
+        return datetime.now(timezone.utc)
 
 
 class SOTAClusterClient:
@@ -1762,7 +2278,9 @@ class SOTAClusterClient:
             logger.debug(f"SOTA spot line: {line}")
         try:
             # SOTA format: DX de G0ABC: 14.062 W4G/NG-001 CW QSL
-            match = re.search(r'DX de (\S+):\s+([\d.]+)\s+(\S+)\s+([\S\d/-]+)\s+([\d]+)Z', line)
+            if 'DX de ' not in line:
+                return None
+            match = SOTA_SPOT_RE.search(line)
             if not match:
                 return None
             
@@ -1789,8 +2307,7 @@ class SOTAClusterClient:
             
             return spot
         except Exception as e:
-            logger.error(f"Error parsing SOTA spot '{line}': {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error parsing SOTA spot '{line}': {e}", exc_info=True)
             return None
     
     def start(self):
@@ -1863,7 +2380,9 @@ class RBNClusterClient:
             if self.debug:
                 logger.info(f"RBN spot line: {line}")
             # Try the full pattern with time first
-            match = re.search(r'DX de (\S+):\s+([\d.]+)\s+(\S+)\s+(\w+)\s+([-\d]+)\s+dB\s+[\d]+\s+WPM\s+(\S+)\s+(\d{4})Z', line)
+            if 'DX de ' not in line:
+                return None
+            match = RBN_SPOT_RE.search(line)
             if match:
                 spot_time = match.group(7)
             else:
@@ -1893,8 +2412,7 @@ class RBNClusterClient:
             
             return spot
         except Exception as e:
-            logger.error(f"Error parsing RBN spot '{line}': {e}")
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.error(f"Error parsing RBN spot '{line}': {e}", exc_info=True)
             return None
     
     def start(self):
@@ -1945,19 +2463,11 @@ class RBNClusterClient:
                 
             spot = self.parse_rbn_spot(line)
             if spot:
-                spot_id = self.db_manager.insert_rbn_spot(spot)
-                if spot_id:
-                    if self.debug:
-                        logger.debug(f"RBN spot {spot_id}: {spot.callsign} {spot.frequency:.1f}kHz "
-                                   f"{spot.snr}dB by {spot.spotter}")
-                    
-                    # Immediately try to find matches for this new spot
-                    matches_found = self.db_manager.find_matches_for_new_spot(spot_id, spot.callsign)
-                    if matches_found > 0:
-                        logger.info(f"Found {matches_found} new matches for RBN spot {spot_id}")
-                        
-                        # Retrieve QRZ and SOTL.AS information for new matches
-                        self.db_manager.enhance_matches_with_location_data()
+                # Inserted in batches; matching runs on the writer thread
+                self.db_manager.insert_rbn_spot(spot)
+                if self.debug:
+                    logger.debug(f"RBN spot queued: {spot.callsign} {spot.frequency:.1f}kHz "
+                               f"{spot.snr}dB by {spot.spotter}")
             else:
                 if self.debug and line.strip():
                     logger.debug(f"RBN line did not parse as spot: {line}")
@@ -1977,13 +2487,30 @@ class SpotMatcher:
         self.sota_client = SOTAClusterClient(self.db_manager, callsign, debug=debug)
         self.rbn_client = RBNClusterClient(self.db_manager, callsign, debug=debug)
         self.running = False
+        # Match-derived reports, reused while their window's matches are unchanged
+        self._report_cache: Dict[str, Tuple[Tuple, object]] = {}
+        # Map builds run on their own thread; requests made during a build coalesce
+        self._map_minutes = 60
+        self._map_trigger = threading.Event()
+        self._map_thread = None
+        self._map_thread_lock = threading.Lock()
+    
+    @property
+    def on_my_callsign_spot(self) -> Callable[[RBNSpot], None]:
+        """Callback run once for each newly stored RBN spot of my callsign"""
+        return self.db_manager.on_my_callsign_spot
+    
+    @on_my_callsign_spot.setter
+    def on_my_callsign_spot(self, callback: Callable[[RBNSpot], None]):
+        self.db_manager.on_my_callsign_spot = callback
     
     def start(self):
         """Start monitoring both clusters"""
         logger.info("Starting SOTA and RBN spot matcher")
         self.running = True
         
-        # Start cluster clients
+        # Start RBN insert writer and cluster clients
+        self.db_manager.start_rbn_writer()
         sota_thread = self.sota_client.start()
         rbn_thread = self.rbn_client.start()
         
@@ -2000,6 +2527,32 @@ class SpotMatcher:
         self.running = False
         self.sota_client.stop()
         self.rbn_client.stop()
+        self.db_manager.stop_rbn_writer()
+        self.db_manager.stop_qrz_workers()
+        self._map_trigger.set()  # Wake the map thread so it sees running is False
+    
+    def request_map(self, minutes: int = 60):
+        """Ask the map thread to rebuild the map without waiting for it"""
+        self._map_minutes = minutes
+        with self._map_thread_lock:
+            if self._map_thread is None or not self._map_thread.is_alive():
+                self._map_thread = threading.Thread(target=self._map_loop, daemon=True)
+                self._map_thread.start()
+        self._map_trigger.set()
+    
+    def _map_loop(self):
+        """Rebuild the map each time it is requested, once per burst of requests"""
+        while True:
+            self._map_trigger.wait()
+            if not self.running:
+                return
+            self._map_trigger.clear()
+            try:
+                map_file = self.generate_map(self._map_minutes)
+                if map_file:
+                    logger.info(f"Interactive propagation map saved as: {map_file}")
+            except Exception as e:
+                logger.error(f"Error generating map: {e}", exc_info=True)
     
     def _match_loop(self):
         """Periodically run matching algorithm and cleanup"""
@@ -2030,85 +2583,88 @@ class SpotMatcher:
                         logger.info(f"Cleaned up {deleted} old RBN spots")
                         
             except Exception as e:
-                logger.error(f"Error in matching/cleanup loop: {e}")
-                logger.error(f"Traceback: {traceback.format_exc()}")
+                logger.error(f"Error in matching/cleanup loop: {e}", exc_info=True)
     
-    def get_my_recent_spots(self, minutes: int = 1440) -> List[Tuple]:
+    def get_my_recent_spots(self, minutes: int = 1440, limit: Optional[int] = None) -> List[Tuple]:
         """Get my callsign's recent RBN spots"""
-        return self.db_manager.get_my_callsign_spots(minutes)
+        return self.db_manager.get_my_callsign_spots(minutes, limit)
+    
+    def _cached_report(self, name: str, minutes: int, build):
+        """Return the cached report for name unless the matches in its window changed"""
+        key = self.db_manager.match_window_key(minutes)
+        cached = self._report_cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        result = build()
+        self._report_cache[name] = (key, result)
+        return result
     
     def get_recent_matches(self, hours: int = 24) -> List[Tuple]:
         """Get recent matches from database"""
-        conn = self.db_manager.get_connection()
-        cursor = conn.cursor()
+        return self._history_report(hours)[1]
+    
+    def _history_report(self, hours: int) -> Tuple[Dict, List]:
+        """Stats and match list for the last hours, built from one query"""
+        minutes = hours * 60
         
-        cursor.execute("""
-            SELECT 
-                s.callsign,
-                s.summit,
-                s.frequency as sota_freq,
-                r.frequency as rbn_freq,
-                s.timestamp as sota_timestamp,
-                r.timestamp as rbn_timestamp,
-                m.time_diff_seconds,
-                m.freq_diff_hz,
-                r.snr,
-                m.sota_spotter,
-                m.rbn_spotter
-            FROM matches m
-            JOIN sota_spots s ON m.sota_id = s.id
-            JOIN rbn_spots r ON m.rbn_id = r.id
-            WHERE m.match_timestamp > DATE_SUB(NOW(), INTERVAL %s HOUR)
-            ORDER BY m.match_timestamp DESC
-        """, (hours,))
-        
-        matches = cursor.fetchall()
-        conn.close()
-        return matches
+        def build():
+            matches = self.db_manager.get_window_matches(minutes)
+            paths = self.db_manager.get_propagation_paths(matches=matches)
+            return self._compute_propagation_stats(paths), matches
+        
+        return self._cached_report('history', minutes, build)
+    
+    def get_dashboard_snapshot(self, hours: int = 1, recent_spots_minutes: int = 60,
+                               limit: int = 10) -> Tuple[Dict, List, int, List]:
+        """Get the propagation stats, my newest spots with their total count and recent matches"""
+        stats, matches = self._history_report(hours)
+        my_spots = self.get_my_recent_spots(recent_spots_minutes, limit)
+        # Only a full page of spots needs the separate count
+        if len(my_spots) < limit:
+            my_spot_count = len(my_spots)
+        else:
+            my_spot_count = self.db_manager.count_my_callsign_spots(recent_spots_minutes)
+        return stats, my_spots, my_spot_count, matches
     
     def generate_map(self, minutes: int = 60) -> str:
         """Generate propagation map and return filename"""
-        return self.db_manager.generate_propagation_map(minutes)
+        map_file = self._cached_report('map', minutes, lambda: self.db_manager.generate_propagation_map(minutes))
+        if map_file and not os.path.exists(map_file):
+            # Removed since it was written; build it again
+            self._report_cache.pop('map', None)
+            map_file = self._cached_report('map', minutes, lambda: self.db_manager.generate_propagation_map(minutes))
+        return map_file
     
     def get_propagation_stats(self, hours: int = 24) -> Dict:
         """Get propagation statistics"""
-        paths = self.db_manager.get_propagation_paths(hours)
-        
+        return self._history_report(hours)[0]
+    
+    def _compute_propagation_stats(self, paths: PropagationPaths) -> Dict:
         if not paths:
             return {"total_paths": 0}
         
         stats = {
             "total_paths": len(paths),
-            "unique_summits": len(set(p.sota_summit for p in paths)),
-            "unique_spotters": len(set(p.rbn_spotter for p in paths)),
-            "avg_distance_km": sum(p.distance_km for p in paths) / len(paths),
-            "max_distance_km": max(p.distance_km for p in paths),
-            "min_distance_km": min(p.distance_km for p in paths),
-            "avg_snr_db": sum(p.snr for p in paths) / len(paths),
-            "frequency_bands": {}
+            "unique_summits": len(set(paths.sota_summit)),
+            "unique_spotters": len(set(paths.rbn_spotter)),
+            "avg_distance_km": float(paths.distance_km.mean()),
+            "max_distance_km": float(paths.distance_km.max()),
+            "min_distance_km": float(paths.distance_km.min()),
+            "avg_snr_db": float(paths.snr.mean())
         }
         
-        # Analyze frequency distribution
-        for path in paths:
-            freq = path.frequency
-            if freq < 7.5:
-                band = "40m and below"
-            elif freq < 14.5:
-                band = "20m"
-            elif freq < 21.5:
-                band = "15m"
-            elif freq < 29.0:
-                band = "12m/10m"
-            else:
-                band = "6m and above"
-            
-            stats["frequency_bands"][band] = stats["frequency_bands"].get(band, 0) + 1
+        # Frequency distribution in one pass, using the same band edges as the map
+        counts = np.bincount(np.digitize(paths.frequency, MAP_BAND_EDGES_KHZ), minlength=len(BAND_LABELS))
+        stats["frequency_bands"] = {
+            label: count for label, count in zip(BAND_LABELS, counts.tolist()) if count
+        }
         
         return stats
 
-def main():
-    # Load configuration from file
-    config = load_config()
+def main(config: Optional[Dict] = None):
+    # Load configuration from file unless the caller already did
+    if config is None:
+        config = load_config()
     
     # Extract configuration values with defaults
     my_callsign = config.get("callsigns", {}).get("my_callsign", "N0CALL")
@@ -2135,96 +2691,129 @@ def main():
     # Configure logging level based on debug flag
     configure_logging(debug=debug)
     
-    matcher = SpotMatcher(
-        callsign=cluster_callsign, 
-        my_callsign=my_callsign,
-        qrz_username=qrz_username,
-        qrz_password=qrz_password,
-        mysql_host=mysql_host,
-        mysql_port=mysql_port,
-        mysql_user=mysql_user,
-        mysql_password=mysql_password,
-        mysql_database=mysql_database,
-        debug=debug
-    )
+    try:
+        matcher = SpotMatcher(
+            callsign=cluster_callsign, 
+            my_callsign=my_callsign,
+            qrz_username=qrz_username,
+            qrz_password=qrz_password,
+            mysql_host=mysql_host,
+            mysql_port=mysql_port,
+            mysql_user=mysql_user,
+            mysql_password=mysql_password,
+            mysql_database=mysql_database,
+            debug=debug
+        )
+    except pymysql.err.OperationalError as e:
+        if e.args and e.args[0] in _MYSQL_CONFIG_ERRORS:
+            raise ConfigError(f"Database configuration rejected: {e}") from e
+        raise TransientError(f"Database unavailable: {e}") from e
     
     try:
         threads = matcher.start()
-        logger.info(f"Monitoring for spots of: {my_callsign}")
-        logger.info("Location lookup priority:")
-        logger.info("1. QRZ.com XML database (most accurate)")
-        logger.info("2. Cached database entries")  
-        logger.info("3. Callsign prefix estimation (fallback)")
-        logger.info("")
-        logger.info("RBN spot retention policy:")
-        logger.info(f"- Spots matching '{my_callsign}': PERMANENT")
-        logger.info("- Spots matching SOTA activations: PERMANENT")
-        logger.info("- Other RBN spots: Deleted after 24 hours")
-        
-        # Run for a while
-        while 1:
-            time.sleep(refresh_interval)  # Configurable refresh interval
+        logger.info("\n".join([
+            f"Monitoring for spots of: {my_callsign}",
+            "Location lookup priority:",
+            "1. QRZ.com XML database (most accurate)",
+            "2. Cached database entries",
+            "3. Callsign prefix estimation (fallback)",
+            "",
+            "RBN spot retention policy:",
+            f"- Spots matching '{my_callsign}': PERMANENT",
+            "- Spots matching SOTA activations: PERMANENT",
+            "- Other RBN spots: Deleted after 24 hours",
+        ]))
+        
+        # Run until shutdown is requested. Reports refresh at most every
+        # refresh_interval: when new matches, spots of my callsign or resolved
+        # locations were written, on every tick while the last report listed
+        # anything that can age out of its window, and at least once per map
+        # window
+        data_changed = matcher.db_manager.data_changed
+        next_map_time = 0.0  # Refresh on the first tick
+        windowed = False  # Whether the last report had time-windowed content
+        
+        # Report lines that only depend on the configuration
+        stats_header = f"=== Propagation Statistics (Last {history_window} Hour(s)) ==="
+        no_my_spots_line = f"No spots of {my_callsign} in the last {recent_spots_window} minutes"
+        no_matches_line = f"No SOTA/RBN matches in the last {history_window} hour(s)"
+        # Section headers with a count, as whole-line templates
+        format_my_spots_header = "My callsign ({callsign}) heard {count} time(s) in the last {minutes} minutes:".format_map
+        format_matches_header = "Found {count} SOTA/RBN matches in the last {hours} hour(s):".format_map
+        # Per-row lines, formatted straight from the dict rows
+        format_my_spot = "  {callsign} {frequency:.1f}kHz {snr}dB {mode} by {spotter} at {timestamp}".format_map
+        format_match = ("  {callsign} on {summit}: SOTA {sota_freq:.3f}MHz (by {sota_spotter}) -> "
+                        "RBN {rbn_freq:.1f}kHz (by {rbn_spotter}) "
+                        "({time_diff_seconds}s, {freq_diff_hz}Hz, {snr}dB)").format_map
+        
+        # Ticks are scheduled on a fixed monotonic cadence so slow refreshes
+        # don't push every later tick back
+        next_tick = time.monotonic() + refresh_interval  # Configurable refresh interval
+        while not SHUTDOWN_EVENT.is_set():
+            if SHUTDOWN_EVENT.wait(max(0.0, next_tick - time.monotonic())):
+                break
+            
+            now = time.monotonic()
+            next_tick += refresh_interval
+            if next_tick <= now:
+                # Overran a whole interval; start a fresh cadence rather than catching up
+                logger.warning(f"Refresh fell {now - next_tick + refresh_interval:.1f}s behind schedule")
+                next_tick = now + refresh_interval
+            
+            if not windowed and not data_changed.is_set() and now < next_map_time:
+                logger.debug("No new matches, spots of my callsign or locations, skipping refresh")
+                continue
+            data_changed.clear()
+            next_map_time = now + map_window * 60
 
+            # One snapshot per refresh; stats and matches share a single query
+            stats, my_spots, my_spot_count, matches = matcher.get_dashboard_snapshot(history_window, recent_spots_window)
+            windowed = bool(my_spots or matches or stats.get('total_paths'))
+            
+            # The whole report goes out as one log record, so lines from the
+            # cluster and writer threads can't interleave with it
+            report = []
+            
             # Show propagation statistics
-            stats = matcher.get_propagation_stats(history_window)  # Configurable window
-            logger.info(f"=== Propagation Statistics (Last {history_window} Hour(s)) ===")
-            logger.info(f"Total propagation paths: {stats.get('total_paths', 0)}")
-            if stats.get('total_paths', 0) > 0:
-                logger.info(f"Unique SOTA summits: {stats.get('unique_summits', 0)}")
-                logger.info(f"Unique RBN spotters: {stats.get('unique_spotters', 0)}")
-                logger.info(f"Average distance: {stats.get('avg_distance_km', 0):.1f} km")
-                logger.info(f"Distance range: {stats.get('min_distance_km', 0):.1f} - {stats.get('max_distance_km', 0):.1f} km")
-                logger.info(f"Average SNR: {stats.get('avg_snr_db', 0):.1f} dB")
-
-                logger.info("Frequency band distribution:")
-                for band, count in stats.get('frequency_bands', {}).items():
-                    logger.info(f"  {band}: {count} paths")
-
-                # Generate interactive map
-                map_file = matcher.generate_map(map_window)  # Configurable window
-                if map_file:
-                    logger.info(f"Interactive propagation map saved as: {map_file}")
+            total_paths = stats.get('total_paths', 0)
+            report.append(stats_header)
+            report.append(f"Total propagation paths: {total_paths}")
+            if total_paths > 0:
+                # Every key is present whenever there are paths
+                report.append(f"Unique SOTA summits: {stats['unique_summits']}")
+                report.append(f"Unique RBN spotters: {stats['unique_spotters']}")
+                report.append(f"Average distance: {stats['avg_distance_km']:.1f} km")
+                report.append(f"Distance range: {stats['min_distance_km']:.1f} - {stats['max_distance_km']:.1f} km")
+                report.append(f"Average SNR: {stats['avg_snr_db']:.1f} dB")
+
+                report.append("Frequency band distribution:")
+                for band, count in stats['frequency_bands'].items():
+                    report.append(f"  {band}: {count} paths")
+
+                # Rebuild the interactive map in the background
+                matcher.request_map(map_window)  # Configurable window
 
             # Show my recent spots
-            my_spots = matcher.get_my_recent_spots(recent_spots_window)  # Configurable window
             if my_spots:
-                logger.info(f"My callsign ({my_callsign}) heard in the last {recent_spots_window} minutes:")
-                for spot in my_spots[:10]:  # Show first 10
-                    callsign, freq, snr, timestamp, spotter, mode = spot
-                    logger.info(f"  {callsign} {float(freq):.1f}kHz {snr}dB {mode} by {spotter} at {timestamp}")
+                report.append(format_my_spots_header({'callsign': my_callsign, 'count': my_spot_count,
+                                                      'minutes': recent_spots_window}))
+                report.extend(map(format_my_spot, my_spots))  # Newest 10, limited in SQL
             else:
-                logger.info(f"No spots of {my_callsign} in the last {recent_spots_window} minutes")
+                report.append(no_my_spots_line)
 
             # Show recent SOTA matches
-            matches = matcher.get_recent_matches(history_window)  # Configurable window
             if matches:
-                logger.info(f"Found {len(matches)} SOTA/RBN matches in the last {history_window} hour(s):")
+                report.append(format_matches_header({'count': len(matches), 'hours': history_window}))
                 for match in matches[:10]:  # Show first 10
                     try:
-                        # Handle both tuple and dictionary formats
-                        if isinstance(match, dict):
-                            callsign = match['callsign']
-                            summit = match['summit']
-                            sota_freq = match['sota_freq']
-                            rbn_freq = match['rbn_freq']
-                            sota_timestamp = match['sota_timestamp']
-                            rbn_timestamp = match['rbn_timestamp']
-                            time_diff = match['time_diff_seconds']
-                            freq_diff = match['freq_diff_hz']
-                            snr = match['snr']
-                            sota_spotter = match['sota_spotter']
-                            rbn_spotter = match['rbn_spotter']
-                        else:
-                            callsign, summit, sota_freq, rbn_freq, sota_timestamp, rbn_timestamp, time_diff, freq_diff, snr, sota_spotter, rbn_spotter = match
-                        
-                        logger.info(f"  {callsign} on {summit}: SOTA {float(sota_freq):.3f}MHz (by {sota_spotter}) -> RBN {float(rbn_freq):.1f}kHz (by {rbn_spotter}) "
-                              f"({time_diff}s, {freq_diff}Hz, {snr}dB)")
+                        report.append(format_match(match))
                     except (ValueError, TypeError, KeyError) as e:
                         logger.error(f"Error formatting match data: {e}")
                         logger.error(f"Match data: {match}")
-                        logger.error(f"Match type: {type(match)}")
             else:
-                logger.info(f"No SOTA/RBN matches in the last {history_window} hour(s)")
+                report.append(no_matches_line)
+            
+            logger.info("\n".join(report))
         
     except KeyboardInterrupt:
         logger.info("Shutting down...")
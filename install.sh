@@ -76,7 +76,7 @@ install_packages() {
     apt install -y mariadb-server mariadb-client
     
     # Python and dependencies
-    apt install -y python3 python3-pip python3-venv python3-requests python3-pymysql
+    apt install -y python3 python3-pip python3-venv python3-requests python3-pymysql python3-numpy
     
     print_success "Required packages installed"
 }